@@ -0,0 +1,90 @@
+"""
+Closed-loop adaptive quality control driven by measured frame latency
+"""
+
+from config import *
+
+
+class AdaptiveQualityController:
+    """Steps through QUALITY_LEVELS to keep the frame time within budget
+
+    Every ADAPT_WINDOW frames the average frame time is compared with the
+    budget of 1 / TARGET_FPS. Above ADAPT_DOWNGRADE_RATIO * budget the
+    controller moves one level down; only after ADAPT_UPGRADE_PATIENCE
+    consecutive windows below ADAPT_UPGRADE_RATIO * budget does it move one
+    level back up. The gap between the two ratios, plus a patience that
+    doubles whenever a recovery immediately fails, keeps it from oscillating.
+    """
+
+    def __init__(self, hand_tracker, levels=QUALITY_LEVELS, target_fps=TARGET_FPS):
+        self.hand_tracker = hand_tracker
+        self.levels = levels
+        self.budget = 1.0 / target_fps
+        self.level = 0
+        self.window_total = 0.0
+        self.window_frames = 0
+        self.good_windows = 0
+        self.patience = ADAPT_UPGRADE_PATIENCE
+        self.just_upgraded = False
+        self.apply()
+
+    @property
+    def settings(self):
+        return self.levels[self.level]
+
+    @property
+    def frame_skip(self):
+        return self.settings["frame_skip"]
+
+    @property
+    def debug_allowed(self):
+        return self.settings["debug"]
+
+    def apply(self):
+        """Push the current level's settings into the tracker"""
+        self.hand_tracker.set_processing_scale(self.settings["scale"])
+        self.hand_tracker.iterations = self.settings["iterations"]
+
+    def update(self, frame_time):
+        """Feed one measured frame time (seconds), returns True if the level changed"""
+        self.window_total += frame_time
+        self.window_frames += 1
+        if self.window_frames < ADAPT_WINDOW:
+            return False
+
+        average = self.window_total / self.window_frames
+        self.window_total = 0.0
+        self.window_frames = 0
+
+        if average > ADAPT_DOWNGRADE_RATIO * self.budget:
+            self.good_windows = 0
+            if self.just_upgraded:
+                # The level we just recovered to cannot be sustained, wait longer next time
+                self.patience = min(2 * self.patience, 64 * ADAPT_UPGRADE_PATIENCE)
+            self.just_upgraded = False
+            return self.set_level(self.level + 1, average)
+
+        self.just_upgraded = False
+        if average < ADAPT_UPGRADE_RATIO * self.budget:
+            self.good_windows += 1
+            if self.good_windows >= self.patience:
+                self.good_windows = 0
+                if self.set_level(self.level - 1, average):
+                    self.just_upgraded = True
+                    return True
+        else:
+            self.good_windows = 0
+            # Stable within budget, relax the recovery patience again
+            self.patience = max(ADAPT_UPGRADE_PATIENCE, self.patience // 2)
+        return False
+
+    def set_level(self, level, average=None):
+        """Switch to a quality level, returns True if it changed"""
+        level = max(0, min(level, len(self.levels) - 1))
+        if level == self.level:
+            return False
+        self.level = level
+        self.apply()
+        measured = f" (frame time {1000.0 * average:.0f}ms)" if average is not None else ""
+        print(f"Quality level {level}: {self.settings}{measured}")
+        return True
@@ -0,0 +1,238 @@
+"""
+Reproducible headless benchmark suite on synthetic hand-motion clips
+"""
+
+import os
+import json
+import time
+import argparse
+import platform
+import resource
+import subprocess
+import tracemalloc
+import cv2
+import numpy as np
+from config import *
+from hand_tracker import HandTracker
+from virtual_object import VirtualObject
+from state_manager import StateManager
+from visualizer import Visualizer
+from performance_monitor import PerformanceMonitor
+from buffer_arena import BufferArena
+from synthetic_video import standard_clips
+from main import render_frame
+
+# Tracker configurations compared by the suite (HandTracker keyword arguments)
+BENCHMARK_CONFIGS = {
+    "baseline": {},
+    "roi": {"roi_tracking": True},
+    "lut": {"skin_classifier": "lut"},
+    "motion": {"motion_gating": True},
+    "pyramid": {"pyramid_scale": 0.25},
+    "pyramid8": {"pyramid_scale": 0.125},
+    "components": {"blob_method": "components"},
+    "fingertip": {"tracking_point": "fingertip"},
+    "strips": {"skin_workers": 4},
+    "incremental": {"incremental": True},
+}
+
+# Frames processed before timing starts
+BENCHMARK_WARMUP_FRAMES = 10
+
+# Relative FPS drop / absolute accuracy drop reported as a regression
+FPS_REGRESSION = 0.10
+ACCURACY_REGRESSION = 0.01
+
+
+def git_version():
+    """Short git revision of the working tree, or 'unknown'"""
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                             text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        return rev.stdout.strip() or "unknown"
+    except OSError:
+        return "unknown"
+
+
+class BenchmarkRun:
+    """All components of one tracking pipeline, instrumented"""
+
+    def __init__(self, tracker_kwargs, window):
+        self.monitor = PerformanceMonitor(profiling=True, window=window)
+        arena = BufferArena()
+        self.hand_tracker = HandTracker(arena=arena, profiler=self.monitor, **tracker_kwargs)
+        self.virtual_object = VirtualObject()
+        # Clip time rather than wall time, so state agreement does not depend
+        # on how fast a configuration runs
+        self.state_manager = StateManager(clock=None)
+        self.visualizer = Visualizer(FRAME_WIDTH, FRAME_HEIGHT, arena=arena, profiler=self.monitor)
+
+    def step(self, frame, timestamp=None):
+        """Process and render one frame, returns (hand position, state)"""
+        span = self.monitor.span
+        with span("track"):
+            hand_position, _ = self.hand_tracker.track_hand(frame)
+        with span("distance"):
+            distance = self.virtual_object.calculate_distance(hand_position)
+        with span("classify"):
+            state = self.state_manager.classify_state(distance, timestamp=timestamp)
+            self.virtual_object.set_color(self.state_manager.get_state_color())
+        with span("render"):
+            render_frame(frame, self.virtual_object, self.state_manager, self.visualizer,
+                         hand_position, distance, self.monitor.fps)
+        self.monitor.update()
+        return hand_position, state
+
+    def close(self):
+        """Release the tracker's worker threads"""
+        self.hand_tracker.close()
+
+
+def peak_memory(tracker_kwargs, frames):
+    """Peak traced Python/NumPy allocation (bytes) while processing the frames"""
+    run = BenchmarkRun(tracker_kwargs, window=len(frames))
+    tracemalloc.start()
+    try:
+        for index, frame in enumerate(frames):
+            run.step(frame, index / BENCHMARK_CLIP_FPS)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        run.close()
+
+
+def benchmark_clip(name, tracker_kwargs, clip):
+    """Time and score one configuration on one clip"""
+    frames = [clip.frame(i) for i in range(len(clip))]
+
+    # Warm up caches, lazily built tables and arena buffers on a throwaway run
+    warmup = BenchmarkRun(tracker_kwargs, window=len(frames))
+    for index, frame in enumerate(frames[:BENCHMARK_WARMUP_FRAMES]):
+        warmup.step(frame, index / BENCHMARK_CLIP_FPS)
+    warmup.close()
+
+    run = BenchmarkRun(tracker_kwargs, window=len(frames))
+    truth_distance = VirtualObject()
+
+    errors = []
+    visible = detected = false_positives = agree = 0
+    start = time.perf_counter()
+    for index, frame in enumerate(frames):
+        hand_position, state = run.step(frame, index / BENCHMARK_CLIP_FPS)
+
+        if tracker_kwargs.get("tracking_point") == "fingertip":
+            truth = clip.fingertip(index)
+        else:
+            truth = clip.hand_center(index)
+        true_distance = truth_distance.calculate_distance(truth)
+        if StateManager.state_for_distance(true_distance) == state:
+            agree += 1
+        if truth is None:
+            false_positives += hand_position is not None
+            continue
+        visible += 1
+        if hand_position is not None:
+            detected += 1
+            errors.append(np.hypot(hand_position[0] - truth[0], hand_position[1] - truth[1]))
+    elapsed = time.perf_counter() - start
+    run.close()
+
+    stages = {s["stage"]: {k: v for k, v in s.items() if k != "stage"}
+              for s in run.monitor.all_stats()}
+    errors = np.array(errors) if errors else np.array([np.nan])
+    return {
+        "config": name,
+        "clip": clip.name,
+        "frames": len(frames),
+        "fps": len(frames) / elapsed,
+        "stages": stages,
+        "detection_rate": detected / visible if visible else 1.0,
+        "false_positive_rate": false_positives / (len(frames) - visible) if len(frames) > visible else 0.0,
+        "mean_error_px": float(np.nanmean(errors)),
+        "p95_error_px": float(np.nanpercentile(errors, 95)),
+        "state_agreement": agree / len(frames),
+        "peak_memory_kb": peak_memory(tracker_kwargs, frames) / 1024.0,
+    }
+
+
+def run_suite(configs, frames):
+    """Run every configuration over the standard clips"""
+    results = []
+    for clip in standard_clips(frames):
+        for name in configs:
+            result = benchmark_clip(name, BENCHMARK_CONFIGS[name], clip)
+            print(f"{name:<10} {clip.name:<26} {result['fps']:7.1f} FPS  "
+                  f"track p95 {result['stages']['track']['p95_ms']:6.2f}ms  "
+                  f"detect {100 * result['detection_rate']:5.1f}%  "
+                  f"error {result['mean_error_px']:5.1f}px  "
+                  f"state {100 * result['state_agreement']:5.1f}%")
+            results.append(result)
+    return results
+
+
+def compare(results, baseline_path):
+    """Print changes against a stored results file, returns the regressions found"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    previous = {(r["config"], r["clip"]): r for r in baseline["results"]}
+    regressions = []
+    print(f"\nComparison with {baseline['version']} ({baseline_path}):")
+    for result in results:
+        old = previous.get((result["config"], result["clip"]))
+        if old is None:
+            continue
+        fps_change = result["fps"] / old["fps"] - 1.0
+        detect_change = result["detection_rate"] - old["detection_rate"]
+        state_change = result["state_agreement"] - old["state_agreement"]
+        flags = []
+        if fps_change < -FPS_REGRESSION:
+            flags.append("FPS")
+        if detect_change < -ACCURACY_REGRESSION or state_change < -ACCURACY_REGRESSION:
+            flags.append("ACCURACY")
+        if flags:
+            regressions.append((result["config"], result["clip"], flags))
+        print(f"{result['config']:<10} {result['clip']:<26} FPS {100 * fps_change:+6.1f}%  "
+              f"detect {100 * detect_change:+5.1f}pt  state {100 * state_change:+5.1f}pt"
+              f"{'  REGRESSION: ' + ', '.join(flags) if flags else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Headless hand tracking benchmark suite')
+    parser.add_argument('--configs', nargs='+', default=list(BENCHMARK_CONFIGS),
+                       choices=list(BENCHMARK_CONFIGS), help='Tracker configurations to run')
+    parser.add_argument('--frames', type=int, default=120, help='Frames per synthetic clip')
+    parser.add_argument('--output-dir', type=str, default=BENCHMARK_RESULTS_DIR,
+                       help='Directory results are stored in')
+    parser.add_argument('--compare', type=str, metavar='RESULTS_JSON',
+                       help='Earlier results file to compare against')
+    args = parser.parse_args()
+
+    # Single-threaded OpenCV keeps numbers comparable between machines and runs
+    cv2.setNumThreads(1)
+    version = git_version()
+    results = run_suite(args.configs, args.frames)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    path = os.path.join(args.output_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{version}.json")
+    with open(path, "w") as f:
+        json.dump({
+            "version": version,
+            "timestamp": time.time(),
+            "machine": platform.platform(),
+            "python": platform.python_version(),
+            "opencv": cv2.__version__,
+            "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            "results": results,
+        }, f, indent=2)
+    print(f"\nResults saved to {path}")
+
+    if args.compare:
+        regressions = compare(results, args.compare)
+        if regressions:
+            print(f"{len(regressions)} regression(s) found")
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
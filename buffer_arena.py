@@ -0,0 +1,37 @@
+"""
+Preallocated frame buffers shared by the tracking and render path
+"""
+
+import numpy as np
+
+
+class BufferArena:
+    """Named image buffers reused across frames to avoid per-frame allocations
+
+    `get` returns the same array for a name on every call. A request for a
+    smaller shape (e.g. a region of interest) is served as a view of the
+    existing buffer; only a larger shape or another dtype reallocates, so the
+    arena settles after the first few frames and the steady-state loop no
+    longer allocates images.
+    """
+
+    def __init__(self):
+        self.buffers = {}
+        self.allocations = 0
+
+    def get(self, name, shape, dtype=np.uint8):
+        """Buffer (or view of one) with the given shape, contents undefined"""
+        shape = tuple(shape)
+        buffer = self.buffers.get(name)
+        if (buffer is None or buffer.dtype != dtype or buffer.ndim != len(shape)
+                or any(need > have for need, have in zip(shape, buffer.shape))):
+            buffer = np.empty(shape, dtype=dtype)
+            self.buffers[name] = buffer
+            self.allocations += 1
+        if buffer.shape == shape:
+            return buffer
+        return buffer[tuple(slice(0, n) for n in shape)]
+
+    def nbytes(self):
+        """Total memory held by the arena"""
+        return sum(buffer.nbytes for buffer in self.buffers.values())
@@ -17,17 +17,33 @@ SKIN_UPPER_HSV = (20, 255, 255) # Upper bound for skin color in HSV
 KERNEL_SIZE = (5, 5)
 ITERATIONS = 2
 
+# Smallest contour accepted as a hand (pixels at full processing resolution)
+MIN_CONTOUR_AREA = 400
+
 # Virtual object settings
 VIRTUAL_OBJECT_CENTER = (320, 240)  # Center of the screen
 VIRTUAL_OBJECT_RADIUS = 80          # Circle radius
 VIRTUAL_OBJECT_WIDTH = 160          # Alternative: rectangle width
 VIRTUAL_OBJECT_HEIGHT = 120         # Alternative: rectangle height
 
+# Keep-out zones used with --zones (signed distance field, any number of zones)
+VIRTUAL_ZONES = [
+    {"type": "circle", "center": VIRTUAL_OBJECT_CENTER, "radius": VIRTUAL_OBJECT_RADIUS},
+    {"type": "rectangle", "top_left": (40, 40), "bottom_right": (140, 120)},
+    {"type": "polygon", "points": [(500, 340), (600, 360), (580, 450), (480, 430)]},
+]
+
 # State thresholds (in pixels)
 SAFE_THRESHOLD = 150    # Distance > 150 = SAFE
 WARNING_THRESHOLD = 80  # 80 < Distance <= 150 = WARNING
 DANGER_THRESHOLD = 30   # Distance <= 80 = DANGER (Added this line)
 
+# State debouncing (seconds of capture time). A state is entered once it has
+# been observed for its enter dwell and left once it has been absent for its
+# exit dwell, independent of the frame rate
+STATE_ENTER_DWELL = {"WARNING": 0.2, "DANGER": 0.1}
+STATE_EXIT_DWELL = {"WARNING": 0.3, "DANGER": 0.5}
+
 # Colors (BGR format)
 COLOR_SAFE = (0, 255, 0)      # Green
 COLOR_WARNING = (0, 255, 255) # Yellow
@@ -42,4 +58,107 @@ FONT = cv2.FONT_HERSHEY_SIMPLEX
 
 # Performance
 TARGET_FPS = 8
-FRAME_SKIP = 1  # Process every nth frame (for optimization)
\ No newline at end of file
+FRAME_SKIP = 1  # Process every nth frame (for optimization)
+PIPELINE_QUEUE_SIZE = 2  # Frames buffered between pipeline stages (oldest dropped)
+PROFILE_WINDOW = 300  # Frames kept for rolling latency percentiles
+
+# Multi-stream processing
+SHARED_RING_SLOTS = 4      # Frame slots per stream in shared memory
+STREAM_REPORT_INTERVAL = 1.0  # Seconds between combined status reports
+
+# Offline analysis
+OFFLINE_CHUNK_SIZE = 64  # Frames decoded and processed per batch
+
+# Region-of-interest tracking
+ROI_MARGIN_SCALE = 0.5    # Search margin as a fraction of the hand's bounding box
+ROI_MIN_MARGIN = 40       # Minimum search margin (pixels)
+ROI_REFRESH_INTERVAL = 15 # Force a full-frame search every K frames
+
+# Skin classifier backend
+SKIN_CLASSIFIER = "hsv"          # "hsv" (cvtColor + inRange) or "lut" (lookup table)
+SKIN_LUT_BITS = 8                # Bits per channel in the LUT (8 = exact, 6 = 64^3 bins)
+SKIN_LUT_CACHE_DIR = ".cache"    # Where built lookup tables are stored
+
+# Adaptive quality control
+# Levels from best to cheapest, each one degrading one more aspect:
+# frame skipping, processing resolution, morphology iterations, debug view
+QUALITY_LEVELS = [
+    {"frame_skip": 1, "scale": 1.0, "iterations": ITERATIONS, "debug": True},
+    {"frame_skip": 2, "scale": 1.0, "iterations": ITERATIONS, "debug": True},
+    {"frame_skip": 2, "scale": 0.75, "iterations": ITERATIONS, "debug": True},
+    {"frame_skip": 2, "scale": 0.5, "iterations": 1, "debug": True},
+    {"frame_skip": 3, "scale": 0.5, "iterations": 1, "debug": False},
+]
+ADAPT_WINDOW = 15           # Frames averaged per control decision
+ADAPT_DOWNGRADE_RATIO = 1.0 # Degrade when frame time > ratio * frame budget
+ADAPT_UPGRADE_RATIO = 0.6   # Recover when frame time < ratio * frame budget
+ADAPT_UPGRADE_PATIENCE = 3  # Consecutive good windows needed to step back up
+
+# Benchmarks
+BENCHMARK_RESULTS_DIR = "benchmarks"  # Where benchmark.py stores its results
+BENCHMARK_CLIP_FPS = 15  # Capture rate the synthetic clips stand for (state dwell times)
+
+# Motion gating
+MOTION_GATING = False         # Skip unchanged frames and static skin-colored objects
+MOTION_SCALE = 0.25           # Downscale factor of the motion detection image
+MOTION_PIXEL_THRESHOLD = 15   # Gray level change counted as motion
+MOTION_MIN_FRACTION = 0.002   # Fraction of changed pixels that counts as a change
+MOTION_LEARNING_RATE = 0.02   # Running-average background adaptation rate
+MOTION_MAX_SKIP = 30          # Re-run the full pipeline at least every N frames
+
+# Predictive tracking (constant-velocity Kalman filter)
+TRACK_HISTORY_SIZE = 64          # Filtered positions kept in the history ring
+TRACK_MAX_COAST = 5              # Frames to coast through detection dropouts
+TRACK_ACCEL_NOISE = 1500.0       # Process noise, hand acceleration (pixels/s^2)
+TRACK_MEASUREMENT_NOISE = 4.0    # Detection noise (pixels)
+PREDICTION_LEAD = 0.1            # Look-ahead beyond the measured pipeline latency (s)
+TTC_WARNING = 1.5                # Time-to-contact that raises WARNING (s)
+TTC_DANGER = 0.5                 # Time-to-contact that raises DANGER (s)
+
+# Multi-hand tracking
+MAX_HANDS = 4                 # Largest skin blobs reported as hands per frame
+HAND_MATCH_DISTANCE = 80      # Max movement between frames to keep a hand's ID (pixels)
+HAND_MAX_MISSED = 5           # Frames a lost hand keeps its ID before it is retired
+
+# Headless event stream
+EVENT_HOST = "127.0.0.1"             # Subscribers connect locally
+EVENT_PORT = 8765                    # TCP port of the event server
+EVENT_QUEUE_LIMIT = 64               # Undelivered state transitions before a client is dropped
+EVENT_WRITE_BUFFER_LIMIT = 256 * 1024  # Unsent bytes before a client is dropped
+
+# Telemetry log
+TELEMETRY_DIR = "telemetry"           # Where --telemetry writes its segment files
+TELEMETRY_SEGMENT_FRAMES = 108000     # Records per segment file (1 hour at 30 FPS)
+TELEMETRY_MAX_GAP = 1.0               # Longest time one record may stand for (s)
+TELEMETRY_STAGES = ("capture", "preprocess", "skin", "morphology", "contours",
+                    "state", "overlay", "display")  # Stage timings kept per record
+
+# Coarse-to-fine (pyramid) detection
+PYRAMID_SCALE = None          # Coarse search level, e.g. 0.25 or 0.125 (None = off)
+PYRAMID_LEVELS = (None, 0.25, 0.125)  # Cycled with the 'p' key
+PYRAMID_KERNEL_SIZE = (3, 3)  # Morphology kernel at the coarse level
+PYRAMID_MARGIN = 8            # Padding around the upscaled hand box (pixels)
+
+# Hand blob selection and tracked point
+BLOB_METHOD = "contours"      # "contours" (findContours) or "components" (connectedComponentsWithStats)
+TRACKING_POINT = "center"     # "center" (blob centroid) or "fingertip"
+FINGERTIP_MIN_DEPTH = 10      # Convexity defect depth that marks a raised finger (pixels)
+
+# Tile-parallel skin detection
+SKIN_WORKERS = 1              # Threads running the full-frame skin chain on strips (1 = serial)
+
+# Background recording of the annotated output (--record)
+RECORD_DIR = "recordings"     # Where clips are written
+RECORD_FPS = 15               # Clip frame rate (frames are resampled to it by timestamp)
+RECORD_CODEC = "MJPG"         # FourCC of the cv2.VideoWriter encoder
+RECORD_PRE_SECONDS = 3.0      # Frames kept from before a DANGER trigger (danger mode)
+RECORD_POST_SECONDS = 5.0     # Recording continues this long after the last DANGER frame
+RECORD_QUEUE_SIZE = 30        # Frames the encoder may fall behind before frames are dropped
+
+# Incremental (dirty-tile) skin mask
+INCREMENTAL_MASK = False      # Recompute the skin mask only where the frame changed
+INCREMENTAL_TILE = 32         # Tile size (pixels at processing resolution)
+INCREMENTAL_SCALE = 0.25      # Downscale factor of the change detection image
+INCREMENTAL_THRESHOLD = 16    # Per-channel level change that marks a tile dirty
+INCREMENTAL_MAX_DIRTY = 0.5   # Above this share of dirty tiles, recompute the whole frame
+INCREMENTAL_REFRESH = 30      # Full recompute every N frames, bounding drift
@@ -0,0 +1,239 @@
+"""
+Asyncio event stream of tracking results (newline-delimited JSON)
+"""
+
+import json
+import asyncio
+import argparse
+import threading
+from collections import deque
+from config import *
+
+
+class Subscriber:
+    """Pending output of one connected client
+
+    Per-frame events are coalesced: a client that has not received the last
+    frame event yet only ever gets the newest one. State transitions are
+    queued in order, up to EVENT_QUEUE_LIMIT; a client that falls further
+    behind than that, or whose socket buffer grows past
+    EVENT_WRITE_BUFFER_LIMIT, is disconnected.
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.transitions = deque()
+        self.frame_line = None
+        self.ready = asyncio.Event()
+        self.closed = False
+
+    def push(self, line, coalesce):
+        """Queue an encoded event, returns False if the client is too slow"""
+        if coalesce:
+            self.frame_line = line
+        else:
+            if len(self.transitions) >= EVENT_QUEUE_LIMIT:
+                return False
+            self.transitions.append(line)
+        self.ready.set()
+        return self.writer.transport.get_write_buffer_size() <= EVENT_WRITE_BUFFER_LIMIT
+
+    def take(self):
+        """Everything pending, transitions before the latest frame event"""
+        lines = list(self.transitions)
+        self.transitions.clear()
+        if self.frame_line is not None:
+            lines.append(self.frame_line)
+            self.frame_line = None
+        self.ready.clear()
+        return b"".join(lines)
+
+
+class EventServer:
+    """Publishes tracking events to local TCP or Unix-socket subscribers
+
+    The asyncio loop runs on a background thread. The tracking loop calls
+    publish(), which encodes the event once and hands it to the loop without
+    waiting, so neither slow nor many subscribers can stall tracking.
+    """
+
+    def __init__(self, host=EVENT_HOST, port=EVENT_PORT, unix_path=None):
+        self.host = host
+        self.port = port
+        self.unix_path = unix_path
+        self.subscribers = set()
+        self.loop = None
+        self.server = None
+        self.thread = None
+        self.started = threading.Event()
+        self.error = None
+        self.published = 0
+        self.dropped_subscribers = 0
+
+    def start(self):
+        """Start serving on a background thread, returns once listening"""
+        self.thread = threading.Thread(target=self._run, name="event-server", daemon=True)
+        self.thread.start()
+        self.started.wait()
+        if self.error is not None:
+            raise self.error
+        return self
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            if self.unix_path:
+                start = asyncio.start_unix_server(self._handle, path=self.unix_path)
+            else:
+                start = asyncio.start_server(self._handle, self.host, self.port)
+            self.server = self.loop.run_until_complete(start)
+        except OSError as e:
+            self.error = e
+            self.started.set()
+            return
+        self.started.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.server.close()
+            for subscriber in list(self.subscribers):
+                self._disconnect(subscriber)
+            # Let the client handlers see the disconnect and finish
+            pending = asyncio.all_tasks(self.loop)
+            self.loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self.loop.close()
+
+    def address(self):
+        """Listening address (path for Unix sockets, (host, port) for TCP)"""
+        if self.unix_path:
+            return self.unix_path
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def _handle(self, reader, writer):
+        subscriber = Subscriber(writer)
+        self.subscribers.add(subscriber)
+        try:
+            while not subscriber.closed:
+                await subscriber.ready.wait()
+                data = subscriber.take()
+                if data:
+                    writer.write(data)
+                    await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.subscribers.discard(subscriber)
+            writer.close()
+
+    def _disconnect(self, subscriber):
+        subscriber.closed = True
+        subscriber.ready.set()
+        self.subscribers.discard(subscriber)
+        subscriber.writer.transport.abort()
+
+    def _broadcast(self, line, coalesce):
+        for subscriber in list(self.subscribers):
+            if not subscriber.push(line, coalesce):
+                # Too slow: disconnect rather than buffer without bound
+                self.dropped_subscribers += 1
+                self._disconnect(subscriber)
+
+    def publish(self, event, coalesce=True):
+        """Send an event dict to all subscribers (thread-safe, never blocks)
+
+        coalesce=True marks per-frame events that may be replaced by newer
+        ones; pass False for events every subscriber must see, such as
+        state transitions.
+        """
+        if self.loop is None or not self.loop.is_running():
+            return
+        line = (json.dumps(event, separators=(",", ":")) + "\n").encode()
+        self.published += 1
+        self.loop.call_soon_threadsafe(self._broadcast, line, coalesce)
+
+    def stop(self):
+        """Close all connections and stop the server thread"""
+        if self.loop is not None and self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        if self.thread is not None:
+            self.thread.join(timeout=2.0)
+
+
+class EventPublisher:
+    """Turns per-frame tracking results into frame and transition events"""
+
+    def __init__(self, server):
+        self.server = server
+        self.frame_index = 0
+        self.state = None
+
+    def publish(self, capture_time, hand_position, distance, state, hands=None, latency=None,
+                zone=None):
+        """Publish one processed frame (and a transition if the state changed)
+
+        latency is the state manager's last transition latency (seconds),
+        reported with transitions; zone is the id of the nearest keep-out
+        zone when zones are used.
+        """
+        self.frame_index += 1
+        if state != self.state:
+            event = {
+                "type": "state",
+                "time": capture_time,
+                "frame": self.frame_index,
+                "from": self.state,
+                "to": state,
+            }
+            if latency is not None and self.state is not None:
+                event["latency_ms"] = round(latency * 1000.0, 1)
+            self.server.publish(event, coalesce=False)
+            self.state = state
+
+        event = {
+            "type": "frame",
+            "time": capture_time,
+            "frame": self.frame_index,
+            "position": list(hand_position) if hand_position is not None else None,
+            "distance": round(float(distance), 1) if distance != float('inf') else None,
+            "state": state,
+        }
+        if zone is not None:
+            event["zone"] = zone
+        if hands is not None:
+            ids, positions, severities = hands
+            event["hands"] = [{"id": hand_id, "position": position, "severity": severity}
+                              for hand_id, position, severity
+                              in zip(ids.tolist(), positions.tolist(), severities.tolist())]
+        self.server.publish(event)
+
+
+async def subscribe(host=EVENT_HOST, port=EVENT_PORT, unix_path=None):
+    """Connect to an event server and print every event received"""
+    if unix_path:
+        reader, writer = await asyncio.open_unix_connection(unix_path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    try:
+        async for line in reader:
+            print(line.decode().rstrip())
+    finally:
+        writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Print the event stream of a headless tracker')
+    parser.add_argument('--host', type=str, default=EVENT_HOST, help='Server host')
+    parser.add_argument('--port', type=int, default=EVENT_PORT, help='Server port')
+    parser.add_argument('--unix', type=str, metavar='PATH', help='Unix socket path instead of TCP')
+    args = parser.parse_args()
+    try:
+        asyncio.run(subscribe(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    except ConnectionError as e:
+        print(f"Connection error: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""
+Frame sources behind the capture loop: cameras/video files, raw memory-mapped
+frames, Y4M files and shared-memory frame rings
+"""
+
+import os
+import time
+import argparse
+import cv2
+import numpy as np
+from config import *
+from shared_frames import SharedFrameRing
+
+# Extensions read as headerless BGR24 frames of a given size
+RAW_EXTENSIONS = (".bgr", ".raw")
+
+
+class VideoSource:
+    """cv2.VideoCapture (camera or encoded video file)"""
+
+    def __init__(self, source, width=FRAME_WIDTH, height=FRAME_HEIGHT):
+        self.cap = cv2.VideoCapture(source)
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self, frame=None):
+        """(ret, frame), decoding into `frame` when given"""
+        return self.cap.read(frame)
+
+    def release(self):
+        self.cap.release()
+
+
+class MemmapSource:
+    """Uncompressed BGR frames memory-mapped from a file
+
+    `.npy` files carry their (frames, height, width, 3) shape in the header;
+    raw `.bgr`/`.raw` files are headerless and need the frame size. read()
+    returns read-only views into the mapping, so replay costs no decoding
+    and no copies - only the page cache.
+    """
+
+    def __init__(self, path, width=FRAME_WIDTH, height=FRAME_HEIGHT, loop=False):
+        self.path = path
+        self.loop = loop
+        self.index = 0
+        try:
+            if path.endswith(".npy"):
+                self.frames = np.load(path, mmap_mode="r")
+            else:
+                frame_bytes = width * height * 3
+                count = os.path.getsize(path) // frame_bytes
+                self.frames = np.memmap(path, dtype=np.uint8, mode="r",
+                                        shape=(count, height, width, 3))
+        except (OSError, ValueError) as e:
+            print(f"Error: Could not map {path}: {e}")
+            self.frames = None
+
+    def __len__(self):
+        return 0 if self.frames is None else len(self.frames)
+
+    def isOpened(self):
+        return self.frames is not None and len(self.frames) > 0
+
+    def read(self, frame=None):
+        """(ret, view of the next frame); `frame` is ignored"""
+        if self.frames is None:
+            return False, None
+        if self.index >= len(self.frames):
+            if not self.loop:
+                return False, None
+            self.index = 0
+        view = self.frames[self.index]
+        self.index += 1
+        return True, view
+
+    def release(self):
+        self.frames = None
+
+
+class Y4MSource:
+    """YUV4MPEG2 (4:2:0) file read through a memory map
+
+    Each frame's planes are a view into the mapping; the only per-frame work
+    is the I420 to BGR conversion into a reused buffer.
+    """
+
+    def __init__(self, path, loop=False):
+        self.loop = loop
+        self.index = 0
+        self.data = None
+        try:
+            self.data = np.memmap(path, dtype=np.uint8, mode="r")
+        except (OSError, ValueError) as e:
+            print(f"Error: Could not map {path}: {e}")
+            return
+
+        header_end = self._line_end(0)
+        header = bytes(self.data[:header_end]).decode("ascii").split()
+        if not header or header[0] != "YUV4MPEG2":
+            raise ValueError(f"{path} is not a YUV4MPEG2 file")
+        params = {token[0]: token[1:] for token in header[1:]}
+        if not params.get("C", "420").startswith("420"):
+            raise ValueError(f"Unsupported Y4M chroma format: C{params['C']}")
+        self.width = int(params["W"])
+        self.height = int(params["H"])
+        self.frame_bytes = self.width * self.height * 3 // 2
+
+        # Frame headers ("FRAME" plus optional parameters) vary in length
+        self.offsets = []
+        offset = header_end + 1
+        while offset + self.frame_bytes <= len(self.data):
+            start = self._line_end(offset) + 1
+            if start + self.frame_bytes > len(self.data):
+                break
+            self.offsets.append(start)
+            offset = start + self.frame_bytes
+
+    def _line_end(self, start):
+        newline = np.flatnonzero(self.data[start:start + 1024] == 0x0A)
+        if not len(newline):
+            raise ValueError("Malformed Y4M header")
+        return start + int(newline[0])
+
+    def __len__(self):
+        return len(self.offsets) if self.data is not None else 0
+
+    def isOpened(self):
+        return len(self) > 0
+
+    def planes(self, index):
+        """I420 planes of a frame as one (height * 3/2, width) view"""
+        start = self.offsets[index]
+        return self.data[start:start + self.frame_bytes].reshape(self.height * 3 // 2, self.width)
+
+    def read(self, frame=None):
+        """(ret, BGR frame), converted into `frame` when given"""
+        if self.data is None:
+            return False, None
+        if self.index >= len(self.offsets):
+            if not self.loop:
+                return False, None
+            self.index = 0
+        planes = self.planes(self.index)
+        self.index += 1
+        if frame is not None and frame.shape != (self.height, self.width, 3):
+            frame = None
+        return True, cv2.cvtColor(planes, cv2.COLOR_YUV2BGR_I420, dst=frame)
+
+    def release(self):
+        self.data = None
+
+
+class SharedRingSource:
+    """Newest frames of a SharedFrameRing written by another process
+
+    read() waits for a frame newer than the last one returned and gives a
+    zero-copy view of its slot; several trackers can read the same ring.
+    The writer may overwrite the slot after `slots - 1` newer frames, which
+    `is_current(seq)` detects. With copy=True read() instead copies the
+    frame into a private buffer reused across reads, retrying if the slot
+    was overwritten during the copy, for loops that hold a frame longer.
+    """
+
+    def __init__(self, name, width=FRAME_WIDTH, height=FRAME_HEIGHT, slots=SHARED_RING_SLOTS,
+                 poll_interval=0.001, copy=False):
+        self.poll_interval = poll_interval
+        self.copy = copy
+        self.buffer = None
+        self.last_seq = -1
+        try:
+            self.ring = SharedFrameRing(name=name, slots=slots, width=width, height=height,
+                                        track=False)
+        except FileNotFoundError:
+            print(f"Error: No shared frame ring named {name}")
+            self.ring = None
+
+    def isOpened(self):
+        return self.ring is not None
+
+    def read(self, frame=None):
+        """(ret, newest unseen frame), a view unless copying; `frame` is ignored"""
+        if self.ring is None:
+            return False, None
+        while True:
+            seq, view = self.ring.latest()
+            if seq > self.last_seq:
+                if not self.copy:
+                    self.last_seq = seq
+                    return True, view
+                if self.buffer is None:
+                    self.buffer = np.empty_like(view)
+                np.copyto(self.buffer, view)
+                if self.ring.is_current(seq):
+                    self.last_seq = seq
+                    return True, self.buffer
+                continue
+            if self.ring.closed:
+                return False, None
+            time.sleep(self.poll_interval)
+
+    def is_current(self, seq=None):
+        """True while the last frame returned has not been overwritten"""
+        return self.ring.is_current(self.last_seq if seq is None else seq)
+
+    def release(self):
+        if self.ring is not None:
+            self.ring.release()
+            self.ring = None
+
+
+def open_source(source, width=FRAME_WIDTH, height=FRAME_HEIGHT, loop=False):
+    """Frame source for a camera ID, file path or 'shm:NAME' ring
+
+    All sources share the cv2.VideoCapture calls the capture loops use:
+    isOpened(), read(frame=None) -> (ret, frame) and release().
+    """
+    if isinstance(source, int):
+        return VideoSource(source, width, height)
+    if source.startswith("shm:"):
+        return SharedRingSource(source[4:], width, height)
+    extension = os.path.splitext(source)[1].lower()
+    if extension == ".npy" or extension in RAW_EXTENSIONS:
+        return MemmapSource(source, width, height, loop)
+    if extension == ".y4m":
+        return Y4MSource(source, loop)
+    return VideoSource(source, width, height)
+
+
+def convert(source, output, width=FRAME_WIDTH, height=FRAME_HEIGHT):
+    """Decode a video once into a .npy (or raw .bgr) file for fast replays"""
+    # Frames are streamed to a raw file; .npy gets its header afterwards
+    raw_path = output if not output.endswith(".npy") else output + ".tmp"
+    cap = cv2.VideoCapture(source)
+    count = 0
+    with open(raw_path, "wb") as f:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if frame.shape[:2] != (height, width):
+                frame = cv2.resize(frame, (width, height))
+            f.write(frame.tobytes())
+            count += 1
+    cap.release()
+
+    if raw_path != output:
+        if count:
+            frames = np.memmap(raw_path, dtype=np.uint8, mode="r", shape=(count, height, width, 3))
+            stack = np.lib.format.open_memmap(output, mode="w+", dtype=np.uint8,
+                                              shape=frames.shape)
+            for start in range(0, count, OFFLINE_CHUNK_SIZE):
+                stack[start:start + OFFLINE_CHUNK_SIZE] = frames[start:start + OFFLINE_CHUNK_SIZE]
+            stack.flush()
+            del frames, stack
+        os.remove(raw_path)
+    if not count:
+        print(f"Error: No frames decoded from {source}")
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Decode a video once into a raw frame file')
+    parser.add_argument('video', type=str, help='Input video')
+    parser.add_argument('output', type=str, help='Output .npy or raw .bgr file')
+    parser.add_argument('--size', type=str, default=f"{FRAME_WIDTH}x{FRAME_HEIGHT}",
+                       help='Frame size WxH')
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    count = convert(args.video, args.output, width, height)
+    print(f"Wrote {count} frames to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
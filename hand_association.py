@@ -0,0 +1,68 @@
+"""
+Frame-to-frame identity association for multiple tracked hands
+"""
+
+import numpy as np
+from config import *
+
+
+class HandAssociator:
+    """Assigns stable IDs to hand detections by nearest-neighbour matching
+
+    Tracks are kept as parallel arrays (last position, ID, missed frames).
+    Each frame the pairwise distances between tracks and detections are
+    computed in one NumPy operation and matched greedily, closest pair
+    first. Detections without a track within `max_distance` get a new ID;
+    tracks unmatched for more than `max_missed` frames are retired.
+    """
+
+    def __init__(self, max_distance=HAND_MATCH_DISTANCE, max_missed=HAND_MAX_MISSED):
+        self.max_distance = max_distance
+        self.max_missed = max_missed
+        self.next_id = 1
+        self.reset()
+
+    def reset(self):
+        """Forget all tracks (IDs keep counting up)"""
+        self.positions = np.empty((0, 2), dtype=np.float64)
+        self.ids = np.empty(0, dtype=np.int64)
+        self.missed = np.empty(0, dtype=np.int64)
+
+    def update(self, centers):
+        """Match an (N, 2) array of detections, returns their (N,) IDs"""
+        centers = np.asarray(centers, dtype=np.float64).reshape(-1, 2)
+        track_of = np.full(len(centers), -1, dtype=np.int64)
+
+        if len(self.ids) and len(centers):
+            distances = np.linalg.norm(self.positions[:, None, :] - centers[None, :, :], axis=2)
+            rows, cols = np.unravel_index(np.argsort(distances, axis=None), distances.shape)
+            track_used = np.zeros(len(self.ids), dtype=bool)
+            for row, col in zip(rows, cols):
+                if distances[row, col] > self.max_distance:
+                    break
+                if track_used[row] or track_of[col] >= 0:
+                    continue
+                track_of[col] = row
+                track_used[row] = True
+        else:
+            track_used = np.zeros(len(self.ids), dtype=bool)
+
+        # Matched tracks follow their detection, the others age
+        matched = track_of >= 0
+        self.positions[track_of[matched]] = centers[matched]
+        self.missed[track_used] = 0
+        self.missed[~track_used] += 1
+        ids = np.empty(len(centers), dtype=np.int64)
+        ids[matched] = self.ids[track_of[matched]]
+
+        # Unmatched detections start new tracks
+        new_count = int((~matched).sum())
+        new_ids = np.arange(self.next_id, self.next_id + new_count, dtype=np.int64)
+        self.next_id += new_count
+        ids[~matched] = new_ids
+
+        keep = self.missed <= self.max_missed
+        self.positions = np.concatenate([self.positions[keep], centers[~matched]])
+        self.ids = np.concatenate([self.ids[keep], new_ids])
+        self.missed = np.concatenate([self.missed[keep], np.zeros(new_count, dtype=np.int64)])
+        return ids
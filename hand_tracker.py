@@ -3,59 +3,444 @@ Hand tracking using classical computer vision techniques
 """
 
 import cv2
+import time
 import numpy as np
 from config import *
+from buffer_arena import BufferArena
+from skin_lut import SkinLUT
+from performance_monitor import NULL_MONITOR
+from motion_gate import MotionGate
+from motion_model import HandMotionModel
+from hand_association import HandAssociator
+from strip_parallel import StripPool, chain_halo
+from incremental_mask import IncrementalMask
 
 class HandTracker:
-    def __init__(self):
+    def __init__(self, roi_tracking=False, arena=None, skin_classifier=SKIN_CLASSIFIER,
+                 profiler=None, motion_gating=MOTION_GATING, predictive=False,
+                 pyramid_scale=PYRAMID_SCALE, blob_method=BLOB_METHOD,
+                 tracking_point=TRACKING_POINT, skin_workers=SKIN_WORKERS,
+                 incremental=INCREMENTAL_MASK):
+        # Stage timings are recorded into the profiler (a PerformanceMonitor)
+        self.profiler = profiler if profiler is not None else NULL_MONITOR
+        # All per-frame images are written into preallocated arena buffers
+        self.arena = arena if arena is not None else BufferArena()
         self.kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, KERNEL_SIZE)
         self.previous_center = None
         self.smoothing_factor = 0.7
         
+        # Processing resolution and morphology strength (tunable at runtime)
+        self.processing_scale = 1.0
+        self.pending_scale = None
+        self.process_width = FRAME_WIDTH
+        self.process_height = FRAME_HEIGHT
+        self.iterations = ITERATIONS
+        self.min_contour_area = MIN_CONTOUR_AREA
+        self.hand_area = 0.0  # Contour area of the last hand (frame pixels)
+        
+        # Skin classifier backend: HSV conversion + inRange, or a lookup table
+        if skin_classifier not in ("hsv", "lut"):
+            raise ValueError(f"Unknown skin classifier: {skin_classifier}")
+        self.skin_lut = SkinLUT() if skin_classifier == "lut" else None
+        
+        # Region-of-interest tracking: search only around the last hand
+        self.roi_tracking = roi_tracking
+        self.roi = None  # (x, y, w, h) of the current search region
+        self.roi_frames = 0  # Frames since the last full-frame search
+        
+        # Motion gating: skip unchanged frames, ignore skin that never moves
+        self.motion_gate = MotionGate() if motion_gating else None
+        self.gated_frames = 0  # Consecutive frames answered from the cache
+        self.last_output = None
+        self.hand_box = None  # Last hand bounding box, exempt from motion rejection
+        
+        # Predictive tracking: Kalman filter instead of exponential smoothing
+        self.motion_model = HandMotionModel() if predictive else None
+        
+        # Blob selection backend and the point reported for the hand
+        if blob_method not in ("contours", "components"):
+            raise ValueError(f"Unknown blob method: {blob_method}")
+        if tracking_point not in ("center", "fingertip"):
+            raise ValueError(f"Unknown tracking point: {tracking_point}")
+        self.blob_method = blob_method
+        self.tracking_point = tracking_point
+        
+        # Coarse-to-fine search: find the blob at a pyramid level, refine it
+        # at the processing resolution inside its bounding box
+        self.pyramid_scale = pyramid_scale
+        self.coarse_kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, PYRAMID_KERNEL_SIZE)
+        
+        # Multi-hand tracking: stable IDs across frames (track_hands only)
+        self.associator = HandAssociator()
+        
+        # Intra-frame parallelism: full-frame skin chain on horizontal strips
+        self.strip_pool = StripPool(skin_workers) if skin_workers > 1 else None
+        if self.strip_pool is not None and self.skin_lut is not None:
+            self.strip_luts = [self.skin_lut.worker() for _ in range(skin_workers)]
+        else:
+            self.strip_luts = [None] * skin_workers
+        
+        # Incremental mask: recompute only the tiles that changed (static camera)
+        self.incremental = IncrementalMask() if incremental else None
+        
     def preprocess_frame(self, frame):
         """Preprocess frame for better skin detection"""
         # Resize for faster processing
-        frame = cv2.resize(frame, (FRAME_WIDTH, FRAME_HEIGHT))
+        frame = self.resize_frame(frame)
 
         # Apply Gaussian blur to reduce noise
-        blurred = cv2.GaussianBlur(frame, (5, 5), 0)
+        blurred = self.arena.get("blurred", frame.shape)
+        cv2.GaussianBlur(frame, (5, 5), 0, dst=blurred)
         
         return blurred
     
+    def resize_frame(self, frame):
+        """Resize a captured frame to the processing resolution"""
+        size = (self.process_width, self.process_height)
+        if frame.shape[:2] == (size[1], size[0]):
+            # Already at the processing resolution, nothing writes to it
+            return frame
+        resized = self.arena.get("resized", (size[1], size[0], 3))
+        cv2.resize(frame, size, dst=resized)
+        return resized
+    
+    def set_processing_scale(self, scale):
+        """Request a processing resolution (fraction of FRAME_WIDTH x FRAME_HEIGHT)
+        
+        The change is applied at the start of the next track_hand call, so it
+        is safe to call from another thread.
+        """
+        self.pending_scale = scale
+    
+    def _apply_processing_scale(self):
+        scale = self.pending_scale
+        self.pending_scale = None
+        if scale is None or scale == self.processing_scale:
+            return
+        self.processing_scale = scale
+        self.process_width = max(1, int(round(FRAME_WIDTH * scale)))
+        self.process_height = max(1, int(round(FRAME_HEIGHT * scale)))
+        self.min_contour_area = MIN_CONTOUR_AREA * scale * scale
+        # Positions, regions and cached masks from the old resolution are no
+        # longer valid
+        self._forget_track()
+    
+    def reset(self):
+        """Forget every hand being tracked (IDs restart with new hands)"""
+        self._forget_track()
+        self.associator.reset()
+    
+    def _forget_track(self):
+        """Drop the single-hand track and everything cached from its frames"""
+        self.previous_center = None
+        self.roi = None
+        self.roi_frames = 0
+        self.hand_box = None
+        self.hand_area = 0.0
+        self.last_output = None
+        self.gated_frames = 0
+        if self.motion_model is not None:
+            self.motion_model.reset()
+        if self.incremental is not None:
+            self.incremental.reset()
+    
+    def set_pyramid_scale(self, scale):
+        """Scale of the coarse detection level (e.g. 0.25), None for full-resolution search"""
+        self.pyramid_scale = scale
+    
+    def to_frame_coords(self, point):
+        """Map a point from processing resolution to FRAME_WIDTH x FRAME_HEIGHT"""
+        if point is None or self.processing_scale == 1.0:
+            return point
+        return (int(point[0] / self.processing_scale), int(point[1] / self.processing_scale))
+    
+    def search_region(self):
+        """Region to search in this frame, None means the full frame"""
+        if not self.roi_tracking or self.roi is None or self.roi_frames >= ROI_REFRESH_INTERVAL:
+            self.roi_frames = 0
+            return None
+        self.roi_frames += 1
+        return self.roi
+    
+    def update_roi(self, contour):
+        """Size the next search region around the hand's bounding box"""
+        if contour is None:
+            # Lost the hand, fall back to a full-frame search
+            self.roi = None
+            return
+        x, y, w, h = cv2.boundingRect(contour)
+        margin = max(ROI_MIN_MARGIN, int(ROI_MARGIN_SCALE * max(w, h)))
+        x0 = max(0, x - margin)
+        y0 = max(0, y - margin)
+        x1 = min(self.process_width, x + w + margin)
+        y1 = min(self.process_height, y + h + margin)
+        self.roi = (x0, y0, x1 - x0, y1 - y0)
+    
+    def detect_skin_roi(self, frame, region):
+        """Run the skin pipeline on a region only, returns (full mask, ROI mask)"""
+        x, y, w, h = region
+        # Resize the whole frame but blur/threshold only the region
+        with self.profiler.span("preprocess"):
+            resized = self.resize_frame(frame)
+            blurred = self.arena.get("blurred", (h, w, 3))
+            cv2.GaussianBlur(resized[y:y+h, x:x+w], (5, 5), 0, dst=blurred)
+        mask = self.detect_skin(blurred)
+        self.reject_static(mask, (x, y))
+        
+        # Keep a full-size mask for display, empty outside the region
+        full_mask = self.arena.get("roi_mask", (self.process_height, self.process_width))
+        full_mask.fill(0)
+        full_mask[y:y+h, x:x+w] = mask
+        return full_mask, mask
+    
+    def coarse_region(self, frame, scale):
+        """Locate the hand blob at a pyramid level, returns its box at processing resolution
+        
+        Returns (region or None, coarse mask).
+        """
+        width = max(1, int(round(self.process_width * scale)))
+        height = max(1, int(round(self.process_height * scale)))
+        with self.profiler.span("pyramid"):
+            # Bilinear sampling already averages neighbouring pixels; the
+            # coarse mask only has to find the blob, not its exact outline
+            coarse = self.arena.get("coarse", (height, width, 3))
+            cv2.resize(frame, (width, height), dst=coarse, interpolation=cv2.INTER_LINEAR)
+            mask = self.clean_mask(self.threshold_skin(coarse), self.coarse_kernel, 1)
+            contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        if not contours:
+            return None, mask
+        # Largest blob by area (each area computed once)
+        areas = [cv2.contourArea(c) for c in contours]
+        index = int(np.argmax(areas))
+        if areas[index] < self.min_contour_area * scale * scale:
+            return None, mask
+        largest = contours[index]
+        
+        # Upscale the box, padded so the whole hand is inside
+        x, y, w, h = cv2.boundingRect(largest)
+        margin = PYRAMID_MARGIN + int(np.ceil(1.0 / scale))
+        x0 = max(0, int(x / scale) - margin)
+        y0 = max(0, int(y / scale) - margin)
+        x1 = min(self.process_width, int((x + w) / scale) + margin)
+        y1 = min(self.process_height, int((y + h) / scale) + margin)
+        return (x0, y0, x1 - x0, y1 - y0), mask
+    
+    def reject_static(self, mask, offset=(0, 0)):
+        """Clear skin pixels outside the motion foreground (in place)"""
+        if self.motion_gate is None:
+            return mask
+        with self.profiler.span("motion"):
+            gate = self.arena.get("motion_mask", (self.process_height, self.process_width))
+            self.motion_gate.foreground_mask(self.process_width, self.process_height, dst=gate)
+            # A tracked hand that holds still must not fade into the background
+            if self.hand_box is not None:
+                x, y, w, h = self.hand_box
+                gate[y:y+h, x:x+w] = 255
+            height, width = mask.shape
+            ox, oy = offset
+            cv2.bitwise_and(mask, gate[oy:oy+height, ox:ox+width], dst=mask)
+        return mask
+    
+    def update_hand_box(self, contour):
+        """Remember the hand's (padded) bounding box for motion rejection"""
+        if contour is None:
+            self.hand_box = None
+            return
+        x, y, w, h = cv2.boundingRect(contour)
+        x0, y0 = max(0, x - ROI_MIN_MARGIN), max(0, y - ROI_MIN_MARGIN)
+        self.hand_box = (x0, y0, x + w + ROI_MIN_MARGIN - x0, y + h + ROI_MIN_MARGIN - y0)
+    
     def detect_skin(self, frame):
         """Detect skin-colored regions using HSV thresholding"""
+        with self.profiler.span("skin"):
+            mask = self.threshold_skin(frame)
+        with self.profiler.span("morphology"):
+            return self.clean_mask(mask)
+    
+    def detect_skin_frame(self, frame):
+        """Cleaned skin mask of a whole captured frame, on the strip pool if enabled"""
+        if self.incremental is not None:
+            return self.detect_skin_incremental(frame)
+        if self.strip_pool is not None:
+            return self.detect_skin_strips(frame)
+        
+        # Preprocess frame
+        with self.profiler.span("preprocess"):
+            processed = self.preprocess_frame(frame)
+        
+        # Detect skin
+        return self.detect_skin(processed)
+    
+    def detect_skin_strips(self, frame):
+        """preprocess_frame + detect_skin on the strip pool, returns the same mask
+        
+        Blur, threshold, morphology and the mask blur run per strip with
+        enough halo rows for all of them; only the resize is done up front.
+        """
+        with self.profiler.span("preprocess"):
+            resized = self.resize_frame(frame)
+        height = resized.shape[0]
+        cleaned = self.arena.get("mask", resized.shape[:2])
+        iterations = self.iterations
+        halo = chain_halo((5, 5), KERNEL_SIZE, iterations)
+        
+        width = resized.shape[1]
+        
+        def process(worker, y0, y1, h0, h1):
+            self.detect_skin_region(resized, (0, h0, width, h1), (0, y0, width, y1), cleaned,
+                                    iterations, self.strip_pool.arenas[worker],
+                                    self.strip_luts[worker])
+        
+        # Strips finish in any order, so their stages are timed as one
+        with self.profiler.span("skin"):
+            self.strip_pool.run(process, height, halo)
+        return cleaned
+    
+    def detect_skin_incremental(self, frame):
+        """detect_skin_frame recomputing only the regions that changed since the last frame"""
+        with self.profiler.span("preprocess"):
+            resized = self.resize_frame(frame)
+        incremental = self.incremental
+        iterations = self.iterations
+        halo = chain_halo((5, 5), KERNEL_SIZE, iterations)
+        with self.profiler.span("tiles"):
+            regions = incremental.dirty_regions(resized, halo)
+        if regions is None and self.strip_pool is not None:
+            np.copyto(incremental.mask, self.detect_skin_strips(frame))
+        else:
+            if regions is None:
+                height, width = resized.shape[:2]
+                regions = [((0, 0, width, height), (0, 0, width, height))]
+            with self.profiler.span("skin"):
+                for padded, owned in regions:
+                    self.detect_skin_region(resized, padded, owned, incremental.mask, iterations)
+        
+        # Callers may modify the mask (motion rejection), the cache must not change
+        cleaned = self.arena.get("mask", incremental.mask.shape)
+        np.copyto(cleaned, incremental.mask)
+        return cleaned
+    
+    def detect_skin_region(self, frame, padded, owned, dst, iterations=None, arena=None,
+                           skin_lut=None):
+        """Run blur, threshold and clean_mask on part of a frame
+        
+        The chain runs on the `padded` (x0, y0, x1, y1) rectangle of frame,
+        and its result inside `owned` is written to the same place in dst.
+        With a padding of at least chain_halo() on every side that is not a
+        frame edge, the owned pixels match a full-frame pass exactly.
+        """
+        arena = self.arena if arena is None else arena
+        x0, y0, x1, y1 = padded
+        ox0, oy0, ox1, oy1 = owned
+        region = frame[y0:y1, x0:x1]
+        blurred = arena.get("blurred", region.shape)
+        cv2.GaussianBlur(region, (5, 5), 0, dst=blurred)
+        mask = self.threshold_skin(blurred, arena, skin_lut)
+        mask = self.clean_mask(mask, iterations=iterations, arena=arena)
+        dst[oy0:oy1, ox0:ox1] = mask[oy0 - y0:oy1 - y0, ox0 - x0:ox1 - x0]
+    
+    def threshold_skin(self, frame, arena=None, skin_lut=None):
+        """Raw per-pixel skin mask (works on single frames or stacked frames)"""
+        arena = self.arena if arena is None else arena
+        skin_lut = self.skin_lut if skin_lut is None else skin_lut
+        mask = arena.get("skin_raw", frame.shape[:2])
+        if skin_lut is not None:
+            return skin_lut.classify(frame, dst=mask)
+        
         # Convert to HSV color space
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+        hsv = arena.get("hsv", frame.shape)
+        cv2.cvtColor(frame, cv2.COLOR_BGR2HSV, dst=hsv)
         
         # Create mask for skin color
-        mask = cv2.inRange(hsv, SKIN_LOWER_HSV, SKIN_UPPER_HSV)
+        return cv2.inRange(hsv, SKIN_LOWER_HSV, SKIN_UPPER_HSV, dst=mask)
+    
+    def clean_mask(self, mask, kernel=None, iterations=None, arena=None):
+        """Clean up a raw skin mask with morphology and blur"""
+        kernel = self.kernel if kernel is None else kernel
+        iterations = self.iterations if iterations is None else iterations
+        arena = self.arena if arena is None else arena
+        eroded = arena.get("eroded", mask.shape)
+        dilated = arena.get("dilated", mask.shape)
+        cleaned = arena.get("mask", mask.shape)
         
         # Apply morphological operations to clean up mask
-        mask = cv2.erode(mask, self.kernel, iterations=ITERATIONS)
-        mask = cv2.dilate(mask, self.kernel, iterations=ITERATIONS)
+        cv2.erode(mask, kernel, dst=eroded, iterations=iterations)
+        cv2.dilate(eroded, kernel, dst=dilated, iterations=iterations)
         
         # Apply Gaussian blur to mask
-        mask = cv2.GaussianBlur(mask, (5, 5), 0)
+        cv2.GaussianBlur(dilated, (5, 5), 0, dst=cleaned)
         
-        return mask
+        return cleaned
     
-    def find_hand_contour(self, mask):
+    def find_hand_contour(self, mask, offset=(0, 0)):
         """Find the largest contour (assumed to be hand)"""
-        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE,
+                                       offset=offset)
         
         if not contours:
+            self.hand_area = 0.0
             return None
         
-        # Find the largest contour by area
-        largest_contour = max(contours, key=cv2.contourArea)
+        # Find the largest contour by area (each area computed once)
+        areas = [cv2.contourArea(c) for c in contours]
+        largest = int(np.argmax(areas))
+        largest_contour, area = contours[largest], areas[largest]
         
         # Filter out small contours (noise)
         # Lowered threshold to 400 to detect folded hands/fingers
-        if cv2.contourArea(largest_contour) < 400:
+        # (MIN_CONTOUR_AREA, scaled with the processing resolution)
+        if area < self.min_contour_area:
+            self.hand_area = 0.0
             return None
         
+        self.hand_area = area / (self.processing_scale * self.processing_scale)
         return largest_contour
     
+    def find_hand_blob(self, mask, offset=(0, 0)):
+        """Largest blob via connected components, returns (contour, centroid) or (None, None)
+        
+        Area, bounding box and centroid of every blob come from one
+        connectedComponentsWithStats call; the contour is traced only for
+        the selected blob, inside its bounding box.
+        """
+        count, labels, stats, centroids = cv2.connectedComponentsWithStats(
+            mask, connectivity=8, ltype=cv2.CV_16U)
+        if count < 2:
+            self.hand_area = 0.0
+            return None, None
+        
+        # Label 0 is the background
+        label = 1 + int(np.argmax(stats[1:, cv2.CC_STAT_AREA]))
+        area = stats[label, cv2.CC_STAT_AREA]
+        if area < self.min_contour_area:
+            self.hand_area = 0.0
+            return None, None
+        self.hand_area = area / (self.processing_scale * self.processing_scale)
+        
+        x, y, w, h = stats[label, :4]
+        blob = (labels[y:y+h, x:x+w] == label).view(np.uint8)
+        contours, _ = cv2.findContours(blob, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE,
+                                       offset=(int(x) + offset[0], int(y) + offset[1]))
+        centroid = (centroids[label, 0] + offset[0], centroids[label, 1] + offset[1])
+        return max(contours, key=len), centroid
+    
+    def find_hand_contours(self, mask, max_hands=MAX_HANDS):
+        """Find up to max_hands contours above the area threshold, largest first"""
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        areas = np.array([cv2.contourArea(c) for c in contours])
+        order = np.argsort(-areas, kind="stable")[:max_hands]
+        hands = [contours[i] for i in order if areas[i] >= self.min_contour_area]
+        self.hand_area = areas[order[0]] / self.processing_scale ** 2 if hands else 0.0
+        return hands
+    
+    def contour_centers(self, contours):
+        """(N, 2) array of contour centroids (unsmoothed), empty contours dropped"""
+        moments = np.array([[m["m00"], m["m10"], m["m01"]]
+                            for m in map(cv2.moments, contours)]).reshape(-1, 3)
+        valid = moments[:, 0] > 0
+        centers = moments[valid, 1:] / moments[valid, :1]
+        return centers.astype(np.int64)
+    
     def get_hand_center(self, contour):
         """Calculate center point of hand contour"""
         # Calculate moments
@@ -68,75 +453,199 @@ class HandTracker:
         cx = int(M["m10"] / M["m00"])
         cy = int(M["m01"] / M["m00"])
         
-        # Apply smoothing if previous center exists
-        if self.previous_center is not None:
+        return self.smooth_position(cx, cy)
+    
+    def smooth_position(self, cx, cy):
+        """Exponentially smooth a raw hand position against the previous one"""
+        # Apply smoothing if previous center exists (the motion model, when
+        # enabled, filters the raw centers instead)
+        if self.previous_center is not None and self.motion_model is None:
             cx = int(self.smoothing_factor * cx + (1 - self.smoothing_factor) * self.previous_center[0])
             cy = int(self.smoothing_factor * cy + (1 - self.smoothing_factor) * self.previous_center[1])
         
         self.previous_center = (cx, cy)
         return (cx, cy)
     
-    def detect_fingertip(self, contour):
-        """Alternative: Try to detect fingertip using convex hull"""
-        try:
-            # Calculate convex hull
-            hull = cv2.convexHull(contour, returnPoints=False)
-            
-            if hull is None or len(hull) < 3:
-                return self.get_hand_center(contour)
-            
-            # Find convexity defects
-            defects = cv2.convexityDefects(contour, hull)
-            
-            if defects is None:
-                return self.get_hand_center(contour)
-            
-            # Find the farthest point from convex hull defects (often fingertip)
-            defects = defects[:, 0]
-            farthest_point = None
-            max_distance = 0
-            
-            for i in range(defects.shape[0]):
-                s, e, f, d = defects[i]
-                if d > max_distance:
-                    max_distance = d
-                    farthest_point = tuple(contour[f][0])
-            
-            if farthest_point:
-                return farthest_point
+    def detect_fingertip(self, contour, centroid=None):
+        """Fingertip as the convexity defect end point farthest from the centroid
         
-        except:
-            pass
+        Fingers stick out between convexity defects, so their tips are the
+        start/end points of deep defects; the one farthest from the hand's
+        centroid is taken. Falls back to the center without deep defects.
+        """
+        if centroid is None:
+            M = cv2.moments(contour)
+            if M["m00"] == 0:
+                return None
+            centroid = (M["m10"] / M["m00"], M["m01"] / M["m00"])
         
-        # Fallback to center if fingertip detection fails
-        return self.get_hand_center(contour)
-    
-    def track_hand(self, frame):
-        """Main tracking function - returns hand position and visualization"""
-        # Preprocess frame
-        processed = self.preprocess_frame(frame)
+        defects = None
+        if len(contour) > 3:
+            hull = cv2.convexHull(contour, returnPoints=False)
+            if len(hull) > 3:
+                try:
+                    defects = cv2.convexityDefects(contour, hull)
+                except cv2.error:
+                    # Self-intersecting contours have a non-monotonic hull
+                    defects = None
         
-        # Detect skin
-        skin_mask = self.detect_skin(processed)
+        if defects is not None:
+            # Depths are fixed-point with 8 fractional bits
+            defects = defects.reshape(-1, 4)  # (start, end, farthest, depth) rows
+            min_depth = FINGERTIP_MIN_DEPTH * self.processing_scale * 256
+            defects = defects[defects[:, 3] >= min_depth]
+            if len(defects):
+                candidates = contour[defects[:, :2].ravel(), 0]
+                offsets = candidates - np.asarray(centroid)
+                tip = candidates[np.argmax(np.einsum("ij,ij->i", offsets, offsets))]
+                return self.smooth_position(int(tip[0]), int(tip[1]))
         
+        # Fallback to center without a clear finger
+        return self.smooth_position(int(centroid[0]), int(centroid[1]))
+    
+    def locate_hand(self, skin_mask, offset=(0, 0)):
+        """Find the hand contour and position in a skin mask"""
         # Find hand contour
-        contour = self.find_hand_contour(skin_mask)
+        if self.blob_method == "components":
+            contour, centroid = self.find_hand_blob(skin_mask, offset)
+        else:
+            contour, centroid = self.find_hand_contour(skin_mask, offset), None
         
         if contour is None:
             # FIX: Reset previous center immediately so blue dot disappears
             self.previous_center = None
-            return None, skin_mask
+            return None, None
         
         # Get hand position (center or fingertip)
-        # Using center for simplicity and stability
-        hand_position = self.get_hand_center(contour)
+        if self.tracking_point == "fingertip":
+            return self.detect_fingertip(contour, centroid), contour
+        if centroid is not None:
+            return self.smooth_position(int(centroid[0]), int(centroid[1])), contour
+        return self.get_hand_center(contour), contour
+    
+    def track_hand(self, frame, timestamp=None, draw=True):
+        """Main tracking function - returns hand position and visualization
+        
+        `timestamp` is the capture time (time.monotonic()) used by the
+        motion model; it defaults to now. With draw=False no visualization
+        is rendered and None is returned in its place.
+        """
+        self._apply_processing_scale()
+        if self.motion_gate is None:
+            hand_position, mask_display = self._track(frame, draw)
+        else:
+            hand_position, mask_display = self._gated_track(frame, draw)
+        
+        if self.motion_model is not None:
+            if timestamp is None:
+                timestamp = time.monotonic()
+            # Filtered position; coasts on the prediction through short dropouts
+            hand_position = self.motion_model.update(hand_position, timestamp)
+        return hand_position, mask_display
+    
+    def track_hands(self, frame, max_hands=MAX_HANDS, draw=True):
+        """Track every hand in the frame, returns ((N,) IDs, (N, 2) positions, mask)
+        
+        Always searches the full frame; ROI tracking, motion gating and the
+        motion model apply to the single-hand track_hand only. With
+        draw=False the mask is None.
+        """
+        self._apply_processing_scale()
+        skin_mask = self.detect_skin_frame(frame)
+        
+        with self.profiler.span("contours"):
+            contours = self.find_hand_contours(skin_mask, max_hands)
+            centers = self.contour_centers(contours)
+            positions = centers if self.processing_scale == 1.0 else \
+                (centers / self.processing_scale).astype(np.int64)
+            ids = self.associator.update(positions)
+        
+        if not draw:
+            return ids, positions, None
+        if not contours:
+            return ids, positions, skin_mask
+        
+        mask_display = self.arena.get("mask_display", skin_mask.shape + (3,))
+        cv2.cvtColor(skin_mask, cv2.COLOR_GRAY2BGR, dst=mask_display)
+        cv2.drawContours(mask_display, contours, -1, (0, 255, 0), 2)
+        for hand_id, center in zip(ids, centers):
+            center = (int(center[0]), int(center[1]))
+            cv2.circle(mask_display, center, 10, COLOR_TRACKER, -1)
+            cv2.putText(mask_display, str(hand_id), (center[0] + 12, center[1] - 12),
+                        FONT, 0.6, COLOR_TEXT, 2)
+        return ids, positions, mask_display
+    
+    def _gated_track(self, frame, draw=True):
+        with self.profiler.span("motion"):
+            moving = self.motion_gate.update(frame)
+        # Nothing changed since the last processed frame: reuse its result,
+        # but re-run now and then so the output cannot go stale
+        if not moving and self.last_output is not None and self.gated_frames < MOTION_MAX_SKIP:
+            self.gated_frames += 1
+            return self.last_output
+        
+        self.gated_frames = 0
+        self.motion_gate.mark_processed()
+        self.last_output = self._track(frame, draw)
+        return self.last_output
+    
+    def _track(self, frame, draw=True):
+        region = self.search_region()
+        pyramid_scale = self.pyramid_scale
+        if region is None and pyramid_scale:
+            # Full-frame search at the pyramid level only
+            region, coarse_mask = self.coarse_region(frame, pyramid_scale)
+            if region is None:
+                self.previous_center = None
+                self.update_roi(None)
+                self.update_hand_box(None)
+                self.hand_area = 0.0
+                if not draw:
+                    return None, None
+                skin_mask = self.arena.get("roi_mask", (self.process_height, self.process_width))
+                cv2.resize(coarse_mask, (self.process_width, self.process_height), dst=skin_mask,
+                           interpolation=cv2.INTER_NEAREST)
+                return None, skin_mask
+        
+        if region is None:
+            skin_mask = self.detect_skin_frame(frame)
+            self.reject_static(skin_mask)
+            
+            with self.profiler.span("contours"):
+                hand_position, contour = self.locate_hand(skin_mask)
+        else:
+            # Search only around the previous hand location
+            skin_mask, roi_mask = self.detect_skin_roi(frame, region)
+            with self.profiler.span("contours"):
+                hand_position, contour = self.locate_hand(roi_mask, region[:2])
+        
+        if self.roi_tracking:
+            self.update_roi(contour)
+        if self.motion_gate is not None:
+            self.update_hand_box(contour)
+        
+        if contour is None:
+            return None, skin_mask if draw else None
+        if not draw:
+            return self.to_frame_coords(hand_position), None
         
         # Draw contour on mask for visualization
-        mask_display = cv2.cvtColor(skin_mask, cv2.COLOR_GRAY2BGR)
+        mask_display = self.arena.get("mask_display", skin_mask.shape + (3,))
+        cv2.cvtColor(skin_mask, cv2.COLOR_GRAY2BGR, dst=mask_display)
         cv2.drawContours(mask_display, [contour], -1, (0, 255, 0), 2)
         
         if hand_position:
             cv2.circle(mask_display, hand_position, 10, COLOR_TRACKER, -1)
             cv2.circle(mask_display, hand_position, 15, COLOR_TRACKER, 2)
         
-        return hand_position, mask_display
\ No newline at end of file
+        if region is not None:
+            x, y, w, h = region
+            cv2.rectangle(mask_display, (x, y), (x + w, y + h), COLOR_WARNING, 1)
+        
+        return self.to_frame_coords(hand_position), mask_display
+    
+    def close(self):
+        """Stop the strip worker threads, if any"""
+        if self.strip_pool is not None:
+            self.strip_pool.close()
+            self.strip_pool = None
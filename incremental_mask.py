@@ -0,0 +1,105 @@
+"""
+Dirty-tile tracking for incremental skin mask updates on a static camera
+"""
+
+import cv2
+import numpy as np
+from config import *
+
+
+class IncrementalMask:
+    """Cached skin mask with the frame regions that have to be recomputed
+
+    The frame is divided into tiles. A downscaled copy of each frame is
+    compared with the downscaled input the cached mask was computed from;
+    tiles whose largest per-channel change exceeds `threshold` are dirty.
+    Their mask, grown by the filter chain's halo, is recomputed from the
+    input grown by the halo once more, so every recomputed pixel sees the
+    same input as a full-frame pass. Changes below the threshold are not
+    picked up, so the whole mask is recomputed every `refresh` frames, and
+    whenever more than `max_dirty` of the tiles changed (camera motion,
+    lighting changes), where one full pass is cheaper than many regions.
+    """
+
+    def __init__(self, tile=INCREMENTAL_TILE, scale=INCREMENTAL_SCALE,
+                 threshold=INCREMENTAL_THRESHOLD, refresh=INCREMENTAL_REFRESH,
+                 max_dirty=INCREMENTAL_MAX_DIRTY):
+        self.tile = tile
+        self.scale = scale
+        self.threshold = threshold
+        self.refresh = refresh
+        self.max_dirty = max_dirty
+        self.mask = None       # Cached cleaned mask
+        self.reference = None  # Downscaled input the cached mask reflects
+        self.small = None
+        self.diff = None
+        self.halo = None
+        self.frames = 0        # Frames since the last full refresh
+        self.dirty_fraction = 1.0  # Share of tiles recomputed in the last frame
+
+    def reset(self):
+        """Force a full recompute on the next frame"""
+        self.mask = None
+
+    def _full_refresh(self, halo):
+        self.reference = self.small.copy()
+        self.halo = halo
+        self.frames = 0
+        self.dirty_fraction = 1.0
+        return None
+
+    def dirty_regions(self, frame, halo):
+        """Regions to recompute for a frame at processing resolution
+
+        Returns None when the whole mask must be recomputed (first frame,
+        new frame size or filter footprint, periodic refresh), otherwise a
+        list of (padded, owned) (x0, y0, x1, y1) rectangles: the mask in
+        `owned` is to be computed from the input in `padded`.
+        """
+        height, width = frame.shape[:2]
+        small_size = (max(1, int(width * self.scale)), max(1, int(height * self.scale)))
+        if self.small is None or self.small.shape[:2] != small_size[::-1]:
+            self.small = np.empty((small_size[1], small_size[0], 3), dtype=np.uint8)
+            self.diff = np.empty_like(self.small)
+        cv2.resize(frame, small_size, dst=self.small, interpolation=cv2.INTER_LINEAR)
+
+        self.frames += 1
+        if (self.mask is None or self.mask.shape != (height, width) or halo != self.halo
+                or self.frames >= self.refresh):
+            if self.mask is None or self.mask.shape != (height, width):
+                self.mask = np.empty((height, width), dtype=np.uint8)
+            return self._full_refresh(halo)
+
+        # Largest change inside each tile (tile edges in downscaled pixels),
+        # channels interleaved along the rows
+        step = max(1, int(round(self.tile * self.scale)))
+        cv2.absdiff(self.small, self.reference, dst=self.diff)
+        change = self.diff.reshape(small_size[1], small_size[0] * 3)
+        # Reduce within rows first, the contiguous (cheap) direction
+        change = np.maximum.reduceat(change, np.arange(0, small_size[0] * 3, step * 3), axis=1)
+        change = np.maximum.reduceat(change, np.arange(0, small_size[1], step), axis=0)
+        changed = change > self.threshold
+        self.dirty_fraction = float(changed.mean())
+        if self.dirty_fraction > self.max_dirty:
+            return self._full_refresh(halo)
+        if not changed.any():
+            return []
+
+        # One rectangle per connected group of changed tiles
+        count, _, stats, _ = cv2.connectedComponentsWithStats(changed.view(np.uint8), connectivity=8)
+        regions = []
+        for x, y, w, h, _ in stats[1:count]:
+            # The cached input now matches the recomputed tiles
+            sx0, sy0, sx1, sy1 = x * step, y * step, (x + w) * step, (y + h) * step
+            self.reference[sy0:sy1, sx0:sx1] = self.small[sy0:sy1, sx0:sx1]
+
+            # Mask pixels within the halo of a change can differ; computing
+            # them needs the input within the halo of those
+            ox0 = max(0, x * self.tile - halo)
+            oy0 = max(0, y * self.tile - halo)
+            ox1 = min(width, (x + w) * self.tile + halo)
+            oy1 = min(height, (y + h) * self.tile + halo)
+            padded = (max(0, ox0 - halo), max(0, oy0 - halo),
+                      min(width, ox1 + halo), min(height, oy1 + halo))
+            regions.append((padded, (ox0, oy0, ox1, oy1)))
+        return regions
@@ -4,23 +4,453 @@ Main application - Hand Tracking POC for Arvyax Internship
 """
 
 import cv2
+import time
+import numpy as np
 import argparse
 import traceback
 from config import *
 from hand_tracker import HandTracker
 from virtual_object import VirtualObject
-from state_manager import StateManager
+from zone_field import ZoneField
+from state_manager import StateManager, MultiStateManager
 from visualizer import Visualizer
 from performance_monitor import PerformanceMonitor
+from pipeline import TrackingPipeline
+from buffer_arena import BufferArena
+from adaptive_quality import AdaptiveQualityController
+from event_server import EventServer, EventPublisher
+from frame_source import open_source, SharedRingSource
+from telemetry import TelemetryRecorder
+from video_recorder import VideoRecorder, ImageSaver
+
+def process_frame(frame, hand_tracker, virtual_object, state_manager, timestamp=None, draw=True):
+    """Track the hand and update distance/state for one frame"""
+    # Track hand
+    hand_position, mask_display = hand_tracker.track_hand(frame, timestamp, draw)
+
+    with hand_tracker.profiler.span("state"):
+        # Calculate distance to virtual object
+        distance = virtual_object.calculate_distance(hand_position)
+
+        # Classify state, escalated by the predicted approach if available
+        model = hand_tracker.motion_model
+        if model is not None and model.tracking:
+            latency = time.monotonic() - timestamp if timestamp is not None else 0.0
+            predicted = model.predict(latency + PREDICTION_LEAD)
+            state_manager.classify_state(
+                distance,
+                time_to_contact=model.time_to_contact(virtual_object),
+                predicted_distance=virtual_object.calculate_distance(predicted),
+                timestamp=timestamp,
+            )
+        else:
+            state_manager.classify_state(distance, timestamp=timestamp)
+
+        # Update virtual object color based on state
+        virtual_object.set_color(state_manager.get_state_color())
+
+    return hand_position, distance, mask_display, None
+
+def process_hands(frame, hand_tracker, virtual_object, state_manager, timestamp=None, draw=True):
+    """Track every hand and classify them all at once (MultiStateManager)
+
+    The nearest hand is reported as the primary hand position/distance;
+    hands is (ids, positions, severities) for all of them.
+    """
+    ids, positions, mask_display = hand_tracker.track_hands(frame, draw=draw)
+
+    with hand_tracker.profiler.span("state"):
+        distances = virtual_object.calculate_distances(positions)
+        severities = state_manager.classify_states(ids, distances, timestamp)
+        virtual_object.set_color(state_manager.get_state_color())
+
+    if len(ids) == 0:
+        return None, float('inf'), mask_display, (ids, positions, severities)
+    nearest = int(np.argmin(distances))
+    hand_position = (int(positions[nearest, 0]), int(positions[nearest, 1]))
+    return hand_position, float(distances[nearest]), mask_display, (ids, positions, severities)
+
+def render_frame(frame, virtual_object, state_manager, visualizer, hand_position, distance, fps,
+                 hands=None):
+    """Draw the virtual object, tracker and status overlays on a copy of frame"""
+    # Draw virtual object
+    display_frame = visualizer.arena.get("display", frame.shape)
+    np.copyto(display_frame, frame)
+    try:
+        virtual_object.draw(display_frame)
+    except Exception as e:
+        print(f"Drawing error: {e}")
+        # Draw simple circle as fallback
+        cv2.circle(display_frame, (320, 240), 80, (0, 255, 0), 3)
+
+    # Draw hand position if detected (every hand, colored by its own state)
+    if hands is not None:
+        ids, positions, severities = hands
+        colors = state_manager.state_colors(severities).tolist()
+        for hand_id, position, color in zip(ids.tolist(), positions.tolist(), colors):
+            cv2.circle(display_frame, tuple(position), 8, COLOR_TRACKER, -1)
+            cv2.circle(display_frame, tuple(position), 12, color, 2)
+            cv2.putText(display_frame, str(hand_id), (position[0] + 14, position[1] - 14),
+                       FONT, 0.5, color, 2)
+    elif hand_position is not None:
+        cv2.circle(display_frame, hand_position, 8, COLOR_TRACKER, -1)
+        cv2.circle(display_frame, hand_position, 12, COLOR_TRACKER, 2)
+
+    # Draw status overlay
+    try:
+        anchor = virtual_object.distance_anchor(hand_position) if hand_position is not None else None
+        display_frame = visualizer.draw_status_overlay(
+            display_frame, state_manager, hand_position, distance, anchor
+        )
+    except Exception as e:
+        print(f"Overlay error: {e}")
+        # Add basic text as fallback
+        cv2.putText(display_frame, "SAFE", (10, 30),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+
+    # Display FPS
+    try:
+        display_frame = visualizer.draw_fps(display_frame, fps)
+    except:
+        pass
+
+    # Check performance
+    if fps < TARGET_FPS:
+        cv2.putText(display_frame, "LOW FPS!", (FRAME_WIDTH//2 - 50, 30),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+
+    return display_frame
+
+def show_frame(display_frame, mask_display, visualizer, state_manager, fps, debug):
+    """Show the annotated frame (or the debug view) in a window"""
+    try:
+        if debug and mask_display is not None:
+            combined = visualizer.create_debug_display(
+                display_frame, mask_display, state_manager, fps
+            )
+            cv2.imshow('Hand Tracking POC - Debug View', combined)
+        else:
+            cv2.imshow('Hand Tracking POC - Arvyax Assignment', display_frame)
+    except Exception as e:
+        print(f"Display error: {e}")
+        cv2.imshow('Hand Tracking POC - Arvyax Assignment', display_frame)
+
+def handle_key(key, display_frame, saver=None):
+    """Handle keyboard input, returns 'exit', 'reset', 'pyramid' or None
+
+    Screenshots are written by the saver's thread when one is given.
+    """
+    if key == 27:  # ESC
+        print("\nExiting...")
+        return 'exit'
+    elif key == ord('s'):  # Save screenshot
+        timestamp = cv2.getTickCount()
+        filename = f"screenshot_{timestamp}.png"
+        if saver is not None:
+            saver.save(filename, display_frame)
+        else:
+            cv2.imwrite(filename, display_frame)
+            print(f"Screenshot saved as {filename}")
+    elif key == ord('h'):  # Help
+        print("\nControls:")
+        print("ESC - Exit")
+        print("s   - Save screenshot")
+        print("h   - Show this help")
+        print("p   - Cycle coarse-to-fine detection level")
+    elif key == ord('r'):  # Reset
+        print("Resetting...")
+        return 'reset'
+    elif key == ord('p'):  # Pyramid level
+        return 'pyramid'
+    return None
+
+def cycle_pyramid(hand_tracker):
+    """Switch the tracker to the next PYRAMID_LEVELS entry"""
+    levels = list(PYRAMID_LEVELS)
+    current = hand_tracker.pyramid_scale
+    index = levels.index(current) if current in levels else -1
+    scale = levels[(index + 1) % len(levels)]
+    hand_tracker.set_pyramid_scale(scale)
+    print(f"Pyramid detection: {'off' if scale is None else f'1/{round(1 / scale)} scale'}")
+
+def update_quality(quality, perf_monitor):
+    """Feed the latest frame time to the adaptive quality controller, if any"""
+    if quality is not None and perf_monitor.frame_times:
+        quality.update(perf_monitor.frame_times[-1])
+
+def record_telemetry(telemetry, perf_monitor, hand_tracker, state_manager, hand_position, distance):
+    """Append the latest frame to the telemetry log, if any"""
+    if telemetry is None:
+        return
+    frame_time = perf_monitor.frame_times[-1] if perf_monitor.frame_times else 0.0
+    area = hand_tracker.hand_area if hand_position is not None else 0.0
+    telemetry.record(hand_position, area, distance, state_manager.raw_state,
+                     state_manager.current_state, frame_time, perf_monitor.last_times)
+
+def record_frame(recorder, perf_monitor, display_frame, state_manager):
+    """Hand the annotated frame to the background recorder, if any"""
+    if recorder is None:
+        return
+    with perf_monitor.span("record"):
+        recorder.write(display_frame, state_manager.current_state)
+
+def debug_enabled(args, quality):
+    """Debug view requested and not switched off by the quality controller"""
+    return args.debug and (quality is None or quality.debug_allowed)
+
+def run_serial(cap, args, hand_tracker, virtual_object, state_manager, visualizer, perf_monitor,
+               quality=None, telemetry=None, recorder=None, saver=None):
+    """Capture, process and display every frame on a single thread"""
+    process = process_hands if args.multi_hand else process_frame
+    frame_skip_counter = 0
+    process_frame_now = True
+    hand_position = None
+    distance = float('inf')
+    mask_display = None
+    hands = None
+    fps = 0
+
+    frame = None
+    while True:
+        # Decode into the previous frame's buffer
+        with perf_monitor.span("capture"):
+            ret, frame = cap.read(frame)
+        capture_time = time.monotonic()
+        if not ret:
+            print("End of video stream")
+            break
+
+        frame_skip = quality.frame_skip if quality is not None else FRAME_SKIP
+        frame_skip_counter += 1
+        if frame_skip_counter >= frame_skip:
+            process_frame_now = True
+            frame_skip_counter = 0
+        else:
+            process_frame_now = False
+
+        # Process frame
+        if process_frame_now:
+            try:
+                hand_position, distance, mask_display, hands = process(
+                    frame, hand_tracker, virtual_object, state_manager, capture_time
+                )
+            except Exception as e:
+                print(f"Processing error: {e}")
+                # Continue with previous values
+
+        # Update FPS and draw overlays
+        fps = perf_monitor.update()
+        update_quality(quality, perf_monitor)
+        with perf_monitor.span("overlay"):
+            display_frame = render_frame(frame, virtual_object, state_manager, visualizer,
+                                         hand_position, distance, fps, hands)
+
+        # Show frame
+        with perf_monitor.span("display"):
+            show_frame(display_frame, mask_display, visualizer, state_manager, fps,
+                       debug_enabled(args, quality))
+            key = cv2.waitKey(1) & 0xFF
+        record_telemetry(telemetry, perf_monitor, hand_tracker, state_manager,
+                         hand_position, distance)
+        record_frame(recorder, perf_monitor, display_frame, state_manager)
+
+        # Handle keyboard input
+        action = handle_key(key, display_frame, saver)
+        if action == 'exit':
+            break
+        elif action == 'reset':
+            hand_tracker.reset()
+            hand_position = None
+            distance = float('inf')
+            mask_display = None
+            hands = None
+        elif action == 'pyramid':
+            cycle_pyramid(hand_tracker)
+
+    return fps
+
+def run_pipelined(cap, args, hand_tracker, virtual_object, state_manager, visualizer, perf_monitor,
+                  quality=None, telemetry=None, recorder=None, saver=None):
+    """Run capture, processing and display as concurrent pipeline stages"""
+    fps = 0
+    process_one = process_hands if args.multi_hand else process_frame
+    frame_skip_counter = 0
+    last_result = (None, float('inf'), None, None)
+    reset_requested = False
+
+    def process(frame, capture_time):
+        nonlocal frame_skip_counter, last_result, reset_requested
+        # A reset from the render thread is applied here, between frames, so
+        # it does not race with tracking
+        if reset_requested:
+            reset_requested = False
+            hand_tracker.reset()
+            last_result = (None, float('inf'), None, None)
+        # Skipped frames are rendered with the previous result, as in run_serial
+        frame_skip = quality.frame_skip if quality is not None else FRAME_SKIP
+        frame_skip_counter += 1
+        if frame_skip_counter < frame_skip:
+            return last_result
+        frame_skip_counter = 0
+
+        hand_position, distance, mask_display, hands = process_one(
+            frame, hand_tracker, virtual_object, state_manager, capture_time
+        )
+        # The tracker reuses its buffers for the next frame while this one is
+        # still waiting to be rendered, so hand over a private copy
+        if debug_enabled(args, quality) and mask_display is not None:
+            mask_display = mask_display.copy()
+        else:
+            mask_display = None
+        last_result = (hand_position, distance, mask_display, hands)
+        return last_result
+
+    def render(frame, result):
+        nonlocal fps, reset_requested
+        hand_position, distance, mask_display, hands = result
+        fps = perf_monitor.update()
+        update_quality(quality, perf_monitor)
+        with perf_monitor.span("overlay"):
+            display_frame = render_frame(frame, virtual_object, state_manager, visualizer,
+                                         hand_position, distance, fps, hands)
+        with perf_monitor.span("display"):
+            show_frame(display_frame, mask_display, visualizer, state_manager, fps,
+                       debug_enabled(args, quality))
+            key = cv2.waitKey(1) & 0xFF
+        record_telemetry(telemetry, perf_monitor, hand_tracker, state_manager,
+                         hand_position, distance)
+        record_frame(recorder, perf_monitor, display_frame, state_manager)
+        action = handle_key(key, display_frame, saver)
+        if action == 'reset':
+            reset_requested = True
+        elif action == 'pyramid':
+            cycle_pyramid(hand_tracker)
+        return action != 'exit'
+
+    # Shared ring reads reuse one private buffer, and several frames can be
+    # in flight in the pipeline queues
+    copy_frames = isinstance(cap, SharedRingSource)
+
+    def read_frame():
+        with perf_monitor.span("capture"):
+            ret, frame = cap.read()
+            if ret and copy_frames:
+                frame = frame.copy()
+        return ret, frame
+
+    # Files are not paced by a camera: process every frame instead of dropping
+    live = not args.video or args.video.startswith("shm:")
+    pipeline = TrackingPipeline(read_frame, process, render, live=live)
+    try:
+        pipeline.run()
+    finally:
+        pipeline.report()
+    return fps
+
+def run_headless(cap, args, hand_tracker, virtual_object, state_manager, perf_monitor,
+                 quality=None, events=None, telemetry=None):
+    """Track without any rendering, publishing results to the event stream"""
+    process = process_hands if args.multi_hand else process_frame
+    frame_skip_counter = 0
+    fps = 0
+
+    frame = None
+    try:
+        while True:
+            with perf_monitor.span("capture"):
+                ret, frame = cap.read(frame)
+            capture_time = time.monotonic()
+            if not ret:
+                print("End of video stream")
+                break
+
+            frame_skip = quality.frame_skip if quality is not None else FRAME_SKIP
+            frame_skip_counter += 1
+            if frame_skip_counter < frame_skip:
+                continue
+            frame_skip_counter = 0
+
+            try:
+                hand_position, distance, _, hands = process(
+                    frame, hand_tracker, virtual_object, state_manager, capture_time, draw=False
+                )
+            except Exception as e:
+                print(f"Processing error: {e}")
+                continue
+
+            fps = perf_monitor.update()
+            update_quality(quality, perf_monitor)
+            if events is not None:
+                with perf_monitor.span("publish"):
+                    zone = None
+                    if isinstance(virtual_object, ZoneField) and hand_position is not None:
+                        zone = virtual_object.query(hand_position)[1] or None
+                    events.publish(capture_time, hand_position, distance,
+                                   state_manager.get_state_text(), hands,
+                                   state_manager.last_transition_latency, zone)
+            record_telemetry(telemetry, perf_monitor, hand_tracker, state_manager,
+                             hand_position, distance)
+    except KeyboardInterrupt:
+        print("\nExiting...")
+
+    return fps
 
 def main():
     parser = argparse.ArgumentParser(description='Hand Tracking POC for Arvyax')
     parser.add_argument('--debug', action='store_true', help='Show debug view with mask')
-    parser.add_argument('--video', type=str, help='Use video file instead of camera')
-    parser.add_argument('--shape', type=str, default='circle', 
+    parser.add_argument('--video', type=str,
+                       help='Use a video file, raw frame file (.npy/.bgr/.y4m) '
+                            'or shared frame ring (shm:NAME) instead of the camera')
+    parser.add_argument('--loop', action='store_true',
+                       help='Replay raw frame files (.npy/.bgr/.y4m) endlessly')
+    parser.add_argument('--shape', type=str, default='circle',
                        choices=['circle', 'rectangle'], help='Virtual object shape')
+    parser.add_argument('--zones', action='store_true',
+                       help='Use the VIRTUAL_ZONES keep-out zones instead of a single object')
+    parser.add_argument('--zone-mask', type=str, metavar='IMAGE',
+                       help='Add keep-out zones from a mask image (one zone per gray level)')
+    parser.add_argument('--pipelined', action='store_true',
+                       help='Run capture, tracking and display on separate threads')
+    parser.add_argument('--roi', action='store_true',
+                       help='Search for the hand only around its last position')
+    parser.add_argument('--skin-classifier', type=str, default=SKIN_CLASSIFIER,
+                       choices=['hsv', 'lut'], help='Skin classifier backend')
+    parser.add_argument('--profile', type=str, metavar='PATH',
+                       help='Time every stage and export the statistics (.json or .csv)')
+    parser.add_argument('--motion-gating', action='store_true',
+                       help='Skip unchanged frames and ignore skin-colored objects that never move')
+    parser.add_argument('--predict', action='store_true',
+                       help='Kalman-filter the hand and warn on predicted contact')
+    parser.add_argument('--adaptive', action='store_true',
+                       help='Degrade/restore processing quality to hold the target FPS')
+    parser.add_argument('--pyramid', type=float, default=PYRAMID_SCALE, metavar='SCALE',
+                       help='Detect the hand at this pyramid scale (e.g. 0.25) and refine it '
+                            'at full resolution')
+    parser.add_argument('--blob-method', type=str, default=BLOB_METHOD,
+                       choices=['contours', 'components'], help='Hand blob selection backend')
+    parser.add_argument('--fingertip', action='store_true',
+                       help='Track the fingertip instead of the hand center')
+    parser.add_argument('--incremental', action='store_true',
+                       help='Recompute the skin mask only in tiles that changed (static camera)')
+    parser.add_argument('--skin-workers', type=int, default=SKIN_WORKERS, metavar='N',
+                       help='Threads running the full-frame skin detection on strips')
+    parser.add_argument('--multi-hand', action='store_true',
+                       help=f'Track up to {MAX_HANDS} hands with stable IDs')
+    parser.add_argument('--telemetry', type=str, nargs='?', const=TELEMETRY_DIR, metavar='DIR',
+                       help=f'Log every frame to memory-mapped segments (default dir: {TELEMETRY_DIR})')
+    parser.add_argument('--record', type=str, choices=['danger', 'continuous'],
+                       help='Record the annotated output in the background: clips around '
+                            'each DANGER transition, or everything')
+    parser.add_argument('--record-dir', type=str, default=RECORD_DIR, metavar='DIR',
+                       help='Directory for recorded clips')
+    parser.add_argument('--headless', action='store_true',
+                       help='No display; publish positions and states as NDJSON events')
+    parser.add_argument('--port', type=int, default=EVENT_PORT,
+                       help='TCP port of the headless event server (0 picks a free port)')
+    parser.add_argument('--unix-socket', type=str, metavar='PATH',
+                       help='Serve headless events on a Unix socket instead of TCP')
     args = parser.parse_args()
-    
+
     # Initialize components
     print("Initializing Hand Tracking POC...")
     print("Requirements:")
@@ -30,146 +460,95 @@ def main():
     print("4. Visual feedback overlay ✓")
     print("5. Target: ≥8 FPS on CPU ✓")
     print("\nPress 'ESC' to exit, 's' to save screenshot")
-    
+
+    fps = 0
+    perf_monitor = None
+    hand_tracker = None
+    state_manager = None
+    server = None
+    telemetry = None
+    recorder = None
+    saver = None
     try:
-        hand_tracker = HandTracker()
-        virtual_object = VirtualObject(shape=args.shape)
-        state_manager = StateManager()
-        visualizer = Visualizer(FRAME_WIDTH, FRAME_HEIGHT)
-        perf_monitor = PerformanceMonitor()
-        
-        # Initialize video capture
-        if args.video:
-            cap = cv2.VideoCapture(args.video)
+        arena = BufferArena()
+        # Stage timings feed both --profile and the telemetry log
+        perf_monitor = PerformanceMonitor(profiling=bool(args.profile or args.telemetry))
+        hand_tracker = HandTracker(roi_tracking=args.roi, arena=arena,
+                                   skin_classifier=args.skin_classifier,
+                                   profiler=perf_monitor,
+                                   motion_gating=args.motion_gating or MOTION_GATING,
+                                   predictive=args.predict,
+                                   pyramid_scale=args.pyramid,
+                                   blob_method=args.blob_method,
+                                   tracking_point='fingertip' if args.fingertip else TRACKING_POINT,
+                                   skin_workers=args.skin_workers,
+                                   incremental=args.incremental or INCREMENTAL_MASK)
+        if args.zones or args.zone_mask:
+            virtual_object = ZoneField(VIRTUAL_ZONES if args.zones else ())
+            if args.zone_mask:
+                zone_mask = cv2.imread(args.zone_mask, cv2.IMREAD_GRAYSCALE)
+                if zone_mask is None:
+                    print(f"Error: Could not read zone mask {args.zone_mask}")
+                    return
+                virtual_object.add_mask(zone_mask)
         else:
-            cap = cv2.VideoCapture(CAMERA_ID)
-        
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, FRAME_WIDTH)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, FRAME_HEIGHT)
-        
+            virtual_object = VirtualObject(shape=args.shape)
+        state_manager = MultiStateManager() if args.multi_hand else StateManager()
+        visualizer = Visualizer(FRAME_WIDTH, FRAME_HEIGHT, arena=arena, profiler=perf_monitor)
+
+        # Initialize video capture
+        cap = open_source(args.video if args.video else CAMERA_ID, loop=args.loop)
+
         if not cap.isOpened():
             print("Error: Could not open video source")
             return
-        
-        frame_skip_counter = 0
-        process_frame = True
-        hand_position = None
-        distance = float('inf')
-        fps = 0
-        
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                print("End of video stream")
-                break
-            
-            frame_skip_counter += 1
-            if frame_skip_counter >= FRAME_SKIP:
-                process_frame = True
-                frame_skip_counter = 0
-            else:
-                process_frame = False
-            
-            # Process frame
-            if process_frame:
-                try:
-                    # Track hand
-                    hand_position, mask_display = hand_tracker.track_hand(frame)
-                    
-                    # Calculate distance to virtual object
-                    distance = virtual_object.calculate_distance(hand_position)
-                    
-                    # Classify state
-                    state = state_manager.classify_state(distance)
-                    
-                    # Update virtual object color based on state
-                    virtual_object.set_color(state_manager.get_state_color())
-                except Exception as e:
-                    print(f"Processing error: {e}")
-                    # Continue with previous values
-            
-            # Draw virtual object
-            display_frame = frame.copy()
-            try:
-                virtual_object.draw(display_frame)
-            except Exception as e:
-                print(f"Drawing error: {e}")
-                # Draw simple circle as fallback
-                cv2.circle(display_frame, (320, 240), 80, (0, 255, 0), 3)
-            
-            # Draw hand position if detected
-            if hand_position is not None:
-                cv2.circle(display_frame, hand_position, 8, COLOR_TRACKER, -1)
-                cv2.circle(display_frame, hand_position, 12, COLOR_TRACKER, 2)
-            
-            # Draw status overlay
-            try:
-                display_frame = visualizer.draw_status_overlay(
-                    display_frame, state_manager, hand_position, distance
-                )
-            except Exception as e:
-                print(f"Overlay error: {e}")
-                # Add basic text as fallback
-                cv2.putText(display_frame, "SAFE", (10, 30), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-            
-            # Update and display FPS
-            fps = perf_monitor.update()
-            try:
-                display_frame = visualizer.draw_fps(display_frame, fps)
-            except:
-                pass
-            
-            # Check performance
-            if fps < TARGET_FPS:
-                cv2.putText(display_frame, "LOW FPS!", (FRAME_WIDTH//2 - 50, 30),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-            
-            # Show frame
-            try:
-                if args.debug and 'mask_display' in locals():
-                    combined = visualizer.create_debug_display(
-                        display_frame, mask_display, state_manager, fps
-                    )
-                    cv2.imshow('Hand Tracking POC - Debug View', combined)
-                else:
-                    cv2.imshow('Hand Tracking POC - Arvyax Assignment', display_frame)
-            except Exception as e:
-                print(f"Display error: {e}")
-                cv2.imshow('Hand Tracking POC - Arvyax Assignment', display_frame)
-            
-            # Handle keyboard input
-            key = cv2.waitKey(1) & 0xFF
-            if key == 27:  # ESC
-                print("\nExiting...")
-                break
-            elif key == ord('s'):  # Save screenshot
-                timestamp = cv2.getTickCount()
-                filename = f"screenshot_{timestamp}.png"
-                cv2.imwrite(filename, display_frame)
-                print(f"Screenshot saved as {filename}")
-            elif key == ord('h'):  # Help
-                print("\nControls:")
-                print("ESC - Exit")
-                print("s   - Save screenshot")
-                print("h   - Show this help")
-            elif key == ord('r'):  # Reset
-                print("Resetting...")
-                hand_position = None
-                distance = float('inf')
-    
+        if isinstance(cap, SharedRingSource):
+            # Ring slots are reused after a few frames; a frame is held while
+            # it is tracked and rendered, so read a private copy
+            cap.copy = True
+
+        quality = AdaptiveQualityController(hand_tracker) if args.adaptive else None
+        if args.telemetry:
+            telemetry = TelemetryRecorder(args.telemetry)
+
+        if args.headless:
+            if args.record:
+                print("Warning: --record needs the annotated display, ignored in headless mode")
+            server = EventServer(port=args.port, unix_path=args.unix_socket).start()
+            print(f"Publishing events on {server.address()}")
+            fps = run_headless(cap, args, hand_tracker, virtual_object, state_manager, perf_monitor,
+                               quality, EventPublisher(server), telemetry)
+        else:
+            if args.record:
+                recorder = VideoRecorder(args.record, args.record_dir)
+            saver = ImageSaver()
+            run = run_pipelined if args.pipelined else run_serial
+            fps = run(cap, args, hand_tracker, virtual_object, state_manager, visualizer,
+                      perf_monitor, quality, telemetry, recorder, saver)
+
     except Exception as e:
         print(f"Fatal error: {e}")
         traceback.print_exc()
-    
+
     finally:
         # Release resources
         try:
             cap.release()
         except:
             pass
-        cv2.destroyAllWindows()
-        
+        if server is not None:
+            server.stop()
+        if telemetry is not None:
+            telemetry.close()
+        if recorder is not None:
+            recorder.close()
+        if saver is not None:
+            saver.close()
+        if hand_tracker is not None:
+            hand_tracker.close()
+        if not args.headless:
+            cv2.destroyAllWindows()
+
         # Final performance report
         print("\n" + "="*50)
         print("PERFORMANCE REPORT")
@@ -181,7 +560,20 @@ def main():
             print(f"Final State: {state_manager.get_state_text()}")
         except:
             print("Performance data not available")
+        if recorder is not None:
+            recorder.report()
+        if state_manager is not None:
+            print("-"*50)
+            state_manager.latency_report()
+        if args.profile and perf_monitor is not None:
+            try:
+                print("-"*50)
+                perf_monitor.report()
+                perf_monitor.export(args.profile)
+                print(f"Stage timings saved to {args.profile}")
+            except Exception as e:
+                print(f"Could not export stage timings: {e}")
         print("="*50)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
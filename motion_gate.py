@@ -0,0 +1,85 @@
+"""
+Cheap motion pre-stage that gates the skin detection pipeline
+"""
+
+import cv2
+import numpy as np
+from config import *
+
+
+class MotionGate:
+    """Downscaled grayscale change detection in front of the skin pipeline
+
+    Two comparisons run on a small grayscale copy of each frame:
+    - against the last frame that went through the full pipeline, to decide
+      whether anything changed enough to be worth processing again;
+    - against a slowly adapting running-average background, giving a
+      foreground mask that rejects skin-colored objects that never move.
+    """
+
+    def __init__(self, scale=MOTION_SCALE, threshold=MOTION_PIXEL_THRESHOLD,
+                 min_fraction=MOTION_MIN_FRACTION, learning_rate=MOTION_LEARNING_RATE):
+        self.scale = scale
+        self.threshold = threshold
+        self.min_fraction = min_fraction
+        self.learning_rate = learning_rate
+        self.kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+        self.size = None
+        self.small = None
+        self.gray = None
+        self.reference = None   # Small gray image of the last processed frame
+        self.background = None  # Running-average background (float32)
+        self.diff = None
+        self.changed = None
+        self.foreground = None
+        self.change_fraction = 1.0
+
+    def _downscale(self, frame):
+        height, width = frame.shape[:2]
+        size = (max(1, int(width * self.scale)), max(1, int(height * self.scale)))
+        if self.size != size:
+            self.size = size
+            self.small = np.empty((size[1], size[0], 3), dtype=np.uint8)
+            self.gray = np.empty((size[1], size[0]), dtype=np.uint8)
+            self.diff = np.empty_like(self.gray)
+            self.changed = np.empty_like(self.gray)
+            self.foreground = np.empty_like(self.gray)
+            self.reference = None
+            self.background = None
+        cv2.resize(frame, size, dst=self.small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self.small, cv2.COLOR_BGR2GRAY, dst=self.gray)
+        return self.gray
+
+    def update(self, frame):
+        """Feed a frame, returns True if it changed since the last processed frame"""
+        gray = self._downscale(frame)
+        if self.background is None:
+            self.background = gray.astype(np.float32)
+            self.foreground.fill(0)
+            self.change_fraction = 1.0
+            return True
+
+        # Change against the last processed frame decides the gating
+        cv2.absdiff(gray, self.reference, dst=self.diff)
+        cv2.threshold(self.diff, self.threshold, 255, cv2.THRESH_BINARY, dst=self.changed)
+        self.change_fraction = cv2.countNonZero(self.changed) / self.changed.size
+
+        # Foreground against the running-average background
+        cv2.absdiff(gray, cv2.convertScaleAbs(self.background), dst=self.diff)
+        cv2.threshold(self.diff, self.threshold, 255, cv2.THRESH_BINARY, dst=self.foreground)
+        cv2.dilate(self.foreground, self.kernel, dst=self.foreground, iterations=2)
+        cv2.accumulateWeighted(gray, self.background, self.learning_rate)
+
+        return self.change_fraction >= self.min_fraction
+
+    def mark_processed(self):
+        """Remember the current frame as the reference for the next comparison"""
+        if self.reference is None:
+            self.reference = self.gray.copy()
+        else:
+            np.copyto(self.reference, self.gray)
+
+    def foreground_mask(self, width, height, dst=None):
+        """Foreground mask upscaled to the processing resolution"""
+        return cv2.resize(self.foreground, (width, height), dst=dst,
+                          interpolation=cv2.INTER_NEAREST)
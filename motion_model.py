@@ -0,0 +1,130 @@
+"""
+Predictive hand motion model - constant-velocity Kalman filter and time-to-contact
+"""
+
+import numpy as np
+from config import *
+
+
+class HandMotionModel:
+    """Constant-velocity Kalman filter over hand positions
+
+    State is (x, y, vx, vy) in frame pixels and pixels/second, driven by the
+    frame timestamps so it stays correct when the frame rate changes. The
+    filter coasts on its prediction through short detection dropouts and
+    keeps a bounded, array-backed history of filtered positions.
+    """
+
+    def __init__(self, history_size=TRACK_HISTORY_SIZE, max_coast=TRACK_MAX_COAST,
+                 accel_noise=TRACK_ACCEL_NOISE, measurement_noise=TRACK_MEASUREMENT_NOISE):
+        self.max_coast = max_coast
+        self.accel_noise = accel_noise
+        self.R = np.eye(2) * measurement_noise ** 2
+        self.H = np.array([[1.0, 0.0, 0.0, 0.0],
+                           [0.0, 1.0, 0.0, 0.0]])
+        self.history = np.zeros((history_size, 3))  # (timestamp, x, y) ring
+        self.history_count = 0
+        self.reset()
+
+    def reset(self):
+        """Forget the current track"""
+        self.x = None
+        self.P = None
+        self.timestamp = None
+        self.coasted = 0
+
+    @property
+    def tracking(self):
+        return self.x is not None
+
+    def _predict(self, dt):
+        F = np.eye(4)
+        F[0, 2] = F[1, 3] = dt
+        # White-noise acceleration process model
+        q = self.accel_noise ** 2
+        dt2, dt3, dt4 = dt * dt, dt ** 3 / 2.0, dt ** 4 / 4.0
+        Q = q * np.array([[dt4, 0.0, dt3, 0.0],
+                          [0.0, dt4, 0.0, dt3],
+                          [dt3, 0.0, dt2, 0.0],
+                          [0.0, dt3, 0.0, dt2]])
+        self.x = F @ self.x
+        self.P = F @ self.P @ F.T + Q
+
+    def update(self, measurement, timestamp):
+        """Feed a detection (or None) at a timestamp, returns the filtered position"""
+        if self.x is not None:
+            dt = max(timestamp - self.timestamp, 1e-3)
+            self._predict(dt)
+        self.timestamp = timestamp
+
+        if measurement is None:
+            # Coast through short dropouts, give up after max_coast frames
+            if self.x is None or self.coasted >= self.max_coast:
+                self.reset()
+                return None
+            self.coasted += 1
+            return self.position()
+
+        z = np.array(measurement, dtype=np.float64)
+        if self.x is None:
+            self.x = np.array([z[0], z[1], 0.0, 0.0])
+            # Position is known from the detection, velocity is not
+            self.P = np.diag([self.R[0, 0], self.R[1, 1], 500.0 ** 2, 500.0 ** 2])
+        else:
+            y = z - self.H @ self.x
+            S = self.H @ self.P @ self.H.T + self.R
+            K = self.P @ self.H.T @ np.linalg.inv(S)
+            self.x = self.x + K @ y
+            self.P = (np.eye(4) - K @ self.H) @ self.P
+        self.coasted = 0
+
+        slot = self.history_count % len(self.history)
+        self.history[slot] = (timestamp, self.x[0], self.x[1])
+        self.history_count += 1
+        return self.position()
+
+    def position(self):
+        """Current filtered position as integer pixels, or None"""
+        if self.x is None:
+            return None
+        return (int(round(self.x[0])), int(round(self.x[1])))
+
+    def velocity(self):
+        """Current velocity estimate (pixels/second), or None"""
+        if self.x is None:
+            return None
+        return (float(self.x[2]), float(self.x[3]))
+
+    def predict(self, lead):
+        """Position forecast `lead` seconds ahead of the last update, or None"""
+        if self.x is None:
+            return None
+        return (int(round(self.x[0] + self.x[2] * lead)), int(round(self.x[1] + self.x[3] * lead)))
+
+    def recent(self, count=None):
+        """Chronological (timestamp, x, y) rows of the bounded history"""
+        size = len(self.history)
+        stored = min(self.history_count, size)
+        count = stored if count is None else min(count, stored)
+        end = self.history_count % size
+        indices = (np.arange(end - count, end)) % size
+        return self.history[indices]
+
+    def time_to_contact(self, virtual_object, step=0.05):
+        """Seconds until the hand reaches the object at its current velocity
+
+        The closing speed is measured along the velocity vector through
+        `virtual_object.calculate_distance`, so any object shape works.
+        Returns inf when the hand is not tracked or is moving away.
+        """
+        if self.x is None:
+            return float('inf')
+        here = (self.x[0], self.x[1])
+        ahead = (self.x[0] + self.x[2] * step, self.x[1] + self.x[3] * step)
+        distance = virtual_object.calculate_distance(here)
+        closing_speed = (distance - virtual_object.calculate_distance(ahead)) / step
+        if distance <= 0:
+            return 0.0
+        if closing_speed <= 1e-6:
+            return float('inf')
+        return distance / closing_speed
@@ -0,0 +1,223 @@
+"""
+Headless multi-stream runner - tracks many camera/video sources with a process pool
+"""
+
+import os
+import time
+import queue
+import argparse
+import threading
+import traceback
+import multiprocessing as mp
+from config import *
+from shared_frames import SharedFrameRing
+from frame_source import open_source
+
+
+def parse_source(source):
+    """Camera IDs are given as integers, anything else is a video path"""
+    return int(source) if source.isdigit() else source
+
+
+def capture_stream(source, ring, stop_event, live=True):
+    """Decode frames from one source into its shared memory ring
+
+    Sources that are not live (video files) are not paced by a camera:
+    each frame waits until the worker has processed the previous one, so
+    no frame is skipped and the results do not depend on decode speed.
+    """
+    cap = open_source(source)
+    if not cap.isOpened():
+        print(f"Error: Could not open video source {source}")
+    try:
+        while cap.isOpened() and not stop_event.is_set():
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if not live and not ring.wait_consumed(stop_event):
+                break
+            ring.write(frame)
+    finally:
+        cap.release()
+        ring.close_stream()
+
+
+def stream_worker(worker_id, streams, shape, results, stop_event):
+    """Process pool worker: owns the tracking state of its shard of streams"""
+    # Imported here so the parent process does not build any trackers
+    from hand_tracker import HandTracker
+    from virtual_object import VirtualObject
+    from state_manager import StateManager
+
+    if hasattr(os, "sched_setaffinity"):
+        cpus = sorted(os.sched_getaffinity(0))
+        os.sched_setaffinity(0, {cpus[worker_id % len(cpus)]})
+
+    trackers = {}
+    for stream_id, ring_name in streams:
+        trackers[stream_id] = {
+            "ring": SharedFrameRing(name=ring_name),
+            "tracker": HandTracker(),
+            "object": VirtualObject(shape=shape),
+            "state": StateManager(),
+            "last_seq": -1,
+        }
+
+    try:
+        while trackers and not stop_event.is_set():
+            idle = True
+            for stream_id in list(trackers):
+                entry = trackers[stream_id]
+                ring = entry["ring"]
+                seq, frame = ring.latest()
+                if seq <= entry["last_seq"]:
+                    if ring.closed:
+                        results.put((stream_id, None))
+                        ring.release()
+                        del trackers[stream_id]
+                    continue
+
+                idle = False
+                try:
+                    hand_position, _ = entry["tracker"].track_hand(frame)
+                    distance = entry["object"].calculate_distance(hand_position)
+                    state = entry["state"].classify_state(distance)
+                except Exception as e:
+                    print(f"Processing error (stream {stream_id}): {e}")
+                    # Do not retry the same frame on every poll
+                    entry["last_seq"] = seq
+                    ring.mark_consumed(seq)
+                    continue
+                ring.mark_consumed(seq)
+                # Frames overwritten while we were reading them are discarded
+                if not ring.is_current(seq):
+                    continue
+                entry["last_seq"] = seq
+                results.put((stream_id, (seq, time.time(), hand_position, distance, state.value)))
+
+            if idle:
+                time.sleep(0.002)
+    finally:
+        for entry in trackers.values():
+            entry["ring"].release()
+
+
+class StreamStatus:
+    """Latest result and FPS counter of one stream, kept by the parent"""
+
+    def __init__(self, source):
+        self.source = source
+        self.frames = 0
+        self.window_start = time.time()
+        self.fps = 0.0
+        self.seq = -1
+        self.hand_position = None
+        self.distance = float('inf')
+        self.state = "SAFE"
+        self.finished = False
+
+    def update(self, result):
+        self.seq, _, self.hand_position, self.distance, self.state = result
+        self.frames += 1
+        elapsed = time.time() - self.window_start
+        if elapsed > 1.0:
+            self.fps = self.frames / elapsed
+            self.frames = 0
+            self.window_start = time.time()
+
+    def summary(self, stream_id):
+        distance = "-" if self.distance == float('inf') else f"{int(self.distance)}px"
+        status = "done" if self.finished else f"{self.fps:5.1f} FPS"
+        return (f"[{stream_id}] {str(self.source):<24} {self.state:<8} "
+                f"distance: {distance:<7} frame: {self.seq:<6} {status}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Headless multi-stream hand tracking')
+    parser.add_argument('--video', action='append', default=[],
+                       help='Video file or camera ID (repeat for several streams)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                       help='Number of worker processes')
+    parser.add_argument('--shape', type=str, default='circle',
+                       choices=['circle', 'rectangle'], help='Virtual object shape')
+    parser.add_argument('--interval', type=float, default=STREAM_REPORT_INTERVAL,
+                       help='Seconds between combined status reports')
+    args = parser.parse_args()
+
+    sources = [parse_source(s) for s in args.video] or [CAMERA_ID]
+    workers = max(1, min(args.workers, len(sources)))
+
+    # Spawned workers do not inherit the parent's OpenCV/thread state
+    ctx = mp.get_context("spawn")
+    stop_event = ctx.Event()
+    capture_stop = threading.Event()
+    results = ctx.Queue()
+    rings = [SharedFrameRing(create=True) for _ in sources]
+    status = {i: StreamStatus(source) for i, source in enumerate(sources)}
+
+    processes = []
+    threads = []
+    try:
+        # Shard streams across workers, each stream stays pinned to one worker
+        for worker_id in range(workers):
+            shard = [(i, rings[i].name) for i in range(worker_id, len(sources), workers)]
+            process = ctx.Process(target=stream_worker, name=f"stream-worker-{worker_id}",
+                                  args=(worker_id, shard, args.shape, results, stop_event))
+            process.start()
+            processes.append(process)
+
+        for source, ring in zip(sources, rings):
+            # Camera IDs are live; files wait for their worker
+            live = isinstance(source, int)
+            thread = threading.Thread(target=capture_stream,
+                                      args=(source, ring, capture_stop, live), daemon=True)
+            thread.start()
+            threads.append(thread)
+
+        print(f"Tracking {len(sources)} streams on {workers} workers (Ctrl+C to stop)")
+        next_report = time.time() + args.interval
+        while not all(s.finished for s in status.values()):
+            try:
+                stream_id, result = results.get(timeout=0.1)
+                if result is None:
+                    status[stream_id].finished = True
+                else:
+                    status[stream_id].update(result)
+            except queue.Empty:
+                if not any(p.is_alive() for p in processes):
+                    break
+
+            if time.time() >= next_report:
+                for stream_id, stream in status.items():
+                    print(stream.summary(stream_id))
+                print("-" * 50)
+                next_report = time.time() + args.interval
+
+    except KeyboardInterrupt:
+        print("\nExiting...")
+    except Exception as e:
+        print(f"Fatal error: {e}")
+        traceback.print_exc()
+
+    finally:
+        capture_stop.set()
+        stop_event.set()
+        for thread in threads:
+            thread.join(timeout=1.0)
+        for process in processes:
+            process.join(timeout=2.0)
+            if process.is_alive():
+                process.terminate()
+        for ring in rings:
+            ring.release()
+
+        print("\n" + "="*50)
+        print("MULTI-STREAM REPORT")
+        print("="*50)
+        for stream_id, stream in status.items():
+            print(stream.summary(stream_id))
+        print("="*50)
+
+
+if __name__ == "__main__":
+    main()
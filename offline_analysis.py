@@ -0,0 +1,166 @@
+"""
+Offline analysis - batched, display-free processing of recorded clips
+"""
+
+import csv
+import time
+import argparse
+import cv2
+import numpy as np
+from config import *
+from hand_tracker import HandTracker
+from virtual_object import VirtualObject
+from state_manager import State, StateManager
+
+STATES = list(State)
+
+RESULT_DTYPE = np.dtype([
+    ('frame', np.int32),
+    ('time', np.float64),
+    ('detected', np.bool_),
+    ('x', np.int32),
+    ('y', np.int32),
+    ('distance', np.float32),
+    ('state', np.int8),   # Index into STATES
+])
+
+
+def read_chunks(cap, chunk_size=OFFLINE_CHUNK_SIZE):
+    """Yield (first frame index, frame stack) chunks of shape (T, H, W, 3)
+
+    The stack buffer is reused between chunks, so consumers must be done
+    with one chunk before asking for the next.
+    """
+    stack = np.empty((chunk_size, FRAME_HEIGHT, FRAME_WIDTH, 3), dtype=np.uint8)
+    index = 0
+    while True:
+        count = 0
+        while count < chunk_size:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if frame.shape[:2] == (FRAME_HEIGHT, FRAME_WIDTH):
+                stack[count] = frame
+            else:
+                cv2.resize(frame, (FRAME_WIDTH, FRAME_HEIGHT), dst=stack[count])
+            count += 1
+        if count == 0:
+            return
+        yield index, stack[:count]
+        index += count
+        if count < chunk_size:
+            return
+
+
+class OfflineAnalyzer:
+    """Runs the tracking stages over frame stacks instead of single frames"""
+
+    def __init__(self, shape="circle", chunk_size=OFFLINE_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.hand_tracker = HandTracker()
+        self.virtual_object = VirtualObject(shape=shape)
+        self.state_manager = StateManager(clock=None)  # Timestamps are video time
+        self.blurred = np.empty((chunk_size, FRAME_HEIGHT, FRAME_WIDTH, 3), dtype=np.uint8)
+
+    def skin_masks(self, stack):
+        """Raw skin masks for a (T, H, W, 3) stack, returns (T, H, W)"""
+        count = len(stack)
+        blurred = self.blurred[:count]
+        # Blur is a spatial filter so it has to run frame by frame
+        for t in range(count):
+            cv2.GaussianBlur(stack[t], (5, 5), 0, dst=blurred[t])
+
+        # HSV conversion and thresholding are per-pixel, so the whole stack is
+        # handled as one tall image in a single call each
+        tall = blurred.reshape(count * FRAME_HEIGHT, FRAME_WIDTH, 3)
+        masks = self.hand_tracker.threshold_skin(tall)
+        return masks.reshape(count, FRAME_HEIGHT, FRAME_WIDTH)
+
+    def analyze_chunk(self, first_index, stack, fps):
+        """Analyze one chunk of frames, returns a RESULT_DTYPE array"""
+        results = np.zeros(len(stack), dtype=RESULT_DTYPE)
+        masks = self.skin_masks(stack)
+        for t in range(len(stack)):
+            mask = self.hand_tracker.clean_mask(masks[t])
+            hand_position, _ = self.hand_tracker.locate_hand(mask)
+            distance = self.virtual_object.calculate_distance(hand_position)
+            state = self.state_manager.classify_state(distance, timestamp=(first_index + t) / fps)
+
+            record = results[t]
+            record['frame'] = first_index + t
+            record['time'] = (first_index + t) / fps
+            record['detected'] = hand_position is not None
+            if hand_position is not None:
+                record['x'], record['y'] = hand_position
+            record['distance'] = distance
+            record['state'] = STATES.index(state)
+        return results
+
+    def analyze(self, path):
+        """Analyze a whole video file, returns a RESULT_DTYPE array"""
+        cap = cv2.VideoCapture(path)
+        if not cap.isOpened():
+            raise IOError(f"Could not open video source {path}")
+        fps = cap.get(cv2.CAP_PROP_FPS) or TARGET_FPS
+        chunks = []
+        try:
+            for first_index, stack in read_chunks(cap, self.chunk_size):
+                chunks.append(self.analyze_chunk(first_index, stack, fps))
+        finally:
+            cap.release()
+        if not chunks:
+            return np.zeros(0, dtype=RESULT_DTYPE)
+        return np.concatenate(chunks)
+
+
+def save_results(results, path):
+    """Save results as .npz (structured array) or .csv"""
+    if path.endswith(".npz"):
+        np.savez_compressed(path, results=results,
+                            states=np.array([s.value for s in STATES]))
+        return
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["frame", "time", "detected", "x", "y", "distance", "state"])
+        for r in results:
+            detected = bool(r['detected'])
+            writer.writerow([
+                int(r['frame']), f"{r['time']:.3f}", int(detected),
+                int(r['x']) if detected else "", int(r['y']) if detected else "",
+                f"{r['distance']:.1f}" if detected else "",
+                STATES[r['state']].value,
+            ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline hand tracking analysis of a video clip')
+    parser.add_argument('video', type=str, help='Video file to analyze')
+    parser.add_argument('--output', type=str, default='analysis.csv',
+                       help='Output table (.csv or .npz)')
+    parser.add_argument('--chunk', type=int, default=OFFLINE_CHUNK_SIZE,
+                       help='Frames decoded and processed per batch')
+    parser.add_argument('--shape', type=str, default='circle',
+                       choices=['circle', 'rectangle'], help='Virtual object shape')
+    args = parser.parse_args()
+
+    analyzer = OfflineAnalyzer(shape=args.shape, chunk_size=args.chunk)
+    start = time.time()
+    results = analyzer.analyze(args.video)
+    elapsed = time.time() - start
+    save_results(results, args.output)
+
+    print("\n" + "="*50)
+    print("OFFLINE ANALYSIS REPORT")
+    print("="*50)
+    print(f"Frames: {len(results)}")
+    print(f"Processing time: {elapsed:.1f}s ({len(results) / max(elapsed, 1e-9):.1f} frames/s)")
+    if len(results):
+        print(f"Hand detected: {100.0 * results['detected'].mean():.1f}% of frames")
+        for i, state in enumerate(STATES):
+            print(f"{state.value:<8} {100.0 * (results['state'] == i).mean():5.1f}%")
+    print(f"Results saved to {args.output}")
+    print("="*50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Pre-rendered static overlay layers composited into frames
+"""
+
+import cv2
+import numpy as np
+
+
+class OverlayLayer:
+    """Static drawing rendered once, pasted into frames through its mask
+
+    The drawing is rasterized onto a canvas filled with a sentinel color;
+    every pixel that changed belongs to the layer. Only the bounding
+    rectangle of those pixels is kept, so compositing touches the dirty
+    region instead of the whole frame. Meant for aliased (LINE_8)
+    primitives, whose pixels are written without blending.
+    """
+
+    SENTINEL = (1, 2, 3)
+
+    def __init__(self, shape, draw):
+        # draw(canvas) renders the primitives onto a (H, W, 3) canvas
+        canvas = np.empty(shape, dtype=np.uint8)
+        canvas[:] = self.SENTINEL
+        draw(canvas)
+        mask = np.any(canvas != self.SENTINEL, axis=2).astype(np.uint8) * 255
+        x, y, w, h = cv2.boundingRect(mask)
+        self.rect = (x, y, w, h)
+        self.layer = canvas[y:y+h, x:x+w].copy()
+        self.mask = mask[y:y+h, x:x+w].copy()
+
+    def composite(self, frame):
+        """Paste the layer into frame (in place)"""
+        x, y, w, h = self.rect
+        if w and h:
+            cv2.copyTo(self.layer, self.mask, dst=frame[y:y+h, x:x+w])
+        return frame
+
+
+class TextSprite:
+    """Anti-aliased outlined text rendered once with an alpha mask
+
+    putText is drawn twice (outline, then fill) on black for the color and
+    on a single channel for the coverage, which gives the combined alpha of
+    both passes. Compositing is one blendLinear over the text rectangle.
+    """
+
+    def __init__(self, text, font, scale, outline_color, outline_thickness, color, thickness):
+        (width, height), baseline = cv2.getTextSize(text, font, scale, outline_thickness)
+        pad = outline_thickness
+        self.size = (width, height)
+        self.anchor = (pad, pad + height)  # Text origin inside the sprite
+        shape = (height + baseline + 2 * pad, width + 2 * pad)
+
+        premultiplied = np.zeros(shape + (3,), dtype=np.uint8)
+        coverage = np.zeros(shape, dtype=np.uint8)
+        for target, first, second in ((premultiplied, outline_color, color), (coverage, 255, 255)):
+            cv2.putText(target, text, self.anchor, font, scale, first, outline_thickness, cv2.LINE_AA)
+            cv2.putText(target, text, self.anchor, font, scale, second, thickness, cv2.LINE_AA)
+
+        self.alpha = coverage.astype(np.float32) / 255.0
+        self.inverse_alpha = 1.0 - self.alpha
+        safe_alpha = np.maximum(self.alpha, 1.0 / 255.0)[..., None]
+        self.color = np.clip(premultiplied / safe_alpha, 0, 255).round().astype(np.uint8)
+
+    def composite(self, frame, origin):
+        """Blend the text into frame with its baseline origin at `origin`"""
+        x0 = origin[0] - self.anchor[0]
+        y0 = origin[1] - self.anchor[1]
+        height, width = self.alpha.shape
+        # Clip to the frame
+        fx0, fy0 = max(x0, 0), max(y0, 0)
+        fx1, fy1 = min(x0 + width, frame.shape[1]), min(y0 + height, frame.shape[0])
+        if fx1 <= fx0 or fy1 <= fy0:
+            return frame
+        sx, sy = fx0 - x0, fy0 - y0
+        sprite = (slice(sy, sy + fy1 - fy0), slice(sx, sx + fx1 - fx0))
+        region = frame[fy0:fy1, fx0:fx1]
+        cv2.blendLinear(self.color[sprite], region, self.alpha[sprite], self.inverse_alpha[sprite],
+                        dst=region)
+        return frame
+
+
+class LayerCache:
+    """OverlayLayers built on first use, one per (frame shape, key)"""
+
+    def __init__(self, draw):
+        # draw(canvas, key) renders the static drawing for a key (e.g. a color)
+        self.draw = draw
+        self.layers = {}
+
+    def get(self, shape, key):
+        """Layer for a frame shape and key"""
+        layer = self.layers.get((shape, key))
+        if layer is None:
+            layer = OverlayLayer(shape, lambda canvas: self.draw(canvas, key))
+            self.layers[(shape, key)] = layer
+        return layer
+
+    def clear(self):
+        """Drop all layers, e.g. after the geometry changed"""
+        self.layers.clear()
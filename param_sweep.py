@@ -0,0 +1,321 @@
+"""
+Parameter sweep - scores many skin/morphology/threshold combinations over
+recorded clips in one pass
+"""
+
+import os
+import csv
+import time
+import argparse
+import itertools
+import multiprocessing as mp
+import cv2
+import numpy as np
+from config import *
+from hand_tracker import HandTracker
+from virtual_object import VirtualObject
+from state_manager import SEVERITY, MultiStateManager
+from frame_source import open_source
+
+# Frame ranges handed out per worker, so slow ranges do not hold up the rest
+SWEEP_TASKS_PER_WORKER = 4
+
+
+def mask_grid(lowers, uppers, kernels, iterations):
+    """All (lower HSV, upper HSV, kernel size, iterations) combinations"""
+    return list(itertools.product(lowers, uppers, kernels, iterations))
+
+
+def threshold_grid(safe_thresholds, danger_thresholds):
+    """All (safe, danger) threshold pairs with safe > danger"""
+    return [(safe, danger) for safe, danger in itertools.product(safe_thresholds, danger_thresholds)
+            if safe > danger]
+
+
+def clip_length(path):
+    """(frame count, frames per second or None) of a clip"""
+    source = open_source(path)
+    try:
+        if hasattr(source, "cap"):
+            fps = source.cap.get(cv2.CAP_PROP_FPS) or None
+            return int(source.cap.get(cv2.CAP_PROP_FRAME_COUNT)), fps
+        return len(source), None
+    finally:
+        source.release()
+
+
+def read_range(path, start, stop):
+    """Yield the frames [start, stop) of a clip, at FRAME_WIDTH x FRAME_HEIGHT"""
+    source = open_source(path)
+    try:
+        if hasattr(source, "cap"):
+            source.cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+        else:
+            source.index = start
+        for _ in range(start, stop):
+            ret, frame = source.read()
+            if not ret:
+                return
+            if frame.shape[:2] != (FRAME_HEIGHT, FRAME_WIDTH):
+                frame = cv2.resize(frame, (FRAME_WIDTH, FRAME_HEIGHT))
+            yield frame
+    finally:
+        source.release()
+
+
+def evaluate_range(task):
+    """Raw hand centers of every mask combination for one frame range
+
+    Runs in a worker process. Every frame is decoded, blurred and converted
+    to HSV once; each HSV range is thresholded once and shared by all the
+    morphology settings. Returns (path, start, (combinations, frames, 2)
+    int32 centers, -1 where no hand was found).
+    """
+    path, start, stop, grid = task
+    # Only the per-mask helpers are used: no strip worker threads
+    tracker = HandTracker(skin_workers=1)
+    blurred = np.empty((FRAME_HEIGHT, FRAME_WIDTH, 3), dtype=np.uint8)
+    hsv = np.empty_like(blurred)
+    raw = np.empty((FRAME_HEIGHT, FRAME_WIDTH), dtype=np.uint8)
+    kernels = {size: cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (size, size))
+               for size in {combo[2] for combo in grid}}
+    # Combinations grouped by HSV range: (range, [(combo index, kernel, iterations)])
+    ranges = {}
+    for index, (lower, upper, size, iterations) in enumerate(grid):
+        ranges.setdefault((lower, upper), []).append((index, kernels[size], iterations))
+
+    centers = np.full((len(grid), stop - start, 2), -1, dtype=np.int32)
+    for t, frame in enumerate(read_range(path, start, stop)):
+        cv2.GaussianBlur(frame, (5, 5), 0, dst=blurred)
+        cv2.cvtColor(blurred, cv2.COLOR_BGR2HSV, dst=hsv)
+        for (lower, upper), morphologies in ranges.items():
+            cv2.inRange(hsv, lower, upper, dst=raw)
+            for index, kernel, iterations in morphologies:
+                mask = tracker.clean_mask(raw, kernel, iterations)
+                contour = tracker.find_hand_contour(mask)
+                if contour is None:
+                    continue
+                M = cv2.moments(contour)
+                if M["m00"] != 0:
+                    centers[index, t] = (int(M["m10"] / M["m00"]), int(M["m01"] / M["m00"]))
+    return path, start, centers
+
+
+def smooth_centers(centers):
+    """Apply the tracker's exponential smoothing to a (frames, 2) center sequence"""
+    tracker = HandTracker(skin_workers=1)
+    positions = centers.copy()
+    for t, (x, y) in enumerate(centers):
+        if x < 0:
+            tracker.previous_center = None
+        else:
+            positions[t] = tracker.smooth_position(int(x), int(y))
+    return positions
+
+
+def load_labels(path, frames, virtual_object):
+    """(visible, (frames, 2) true positions, true distances, true severities) from a .truth.csv
+
+    Frames without x/y have no hand. A "state" column, if present, gives the
+    expected state; frames without one have severity -1, and score_clip
+    derives their expected state from the true distance with each candidate
+    threshold pair.
+    """
+    visible = np.zeros(frames, dtype=bool)
+    truth = np.zeros((frames, 2))
+    severities = np.full(frames, -1, dtype=np.int8)
+    states = {state.value: state for state in SEVERITY}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            index = int(row["frame"])
+            if index >= frames:
+                continue
+            if row.get("x"):
+                visible[index] = True
+                truth[index] = (float(row["x"]), float(row["y"]))
+            if row.get("state"):
+                severities[index] = SEVERITY[states[row["state"]]]
+
+    distances = np.full(frames, np.inf)
+    if visible.any():
+        distances[visible] = virtual_object.calculate_distances(truth[visible])
+    return visible, truth, distances, severities
+
+
+def classify_clip(distances, safe, danger, fps):
+    """(frames, thresholds) states of a distance sequence for every threshold pair
+
+    Each pair is classified with the time-based hysteresis of
+    MultiStateManager, all pairs at once.
+    """
+    severities = np.where(distances[:, None] > safe, 0,
+                          np.where(distances[:, None] > danger, 1, 2)).astype(np.int8)
+    manager = MultiStateManager(clock=None)
+    ids = np.arange(len(safe))
+    states = np.empty_like(severities)
+    for t in range(len(distances)):
+        states[t] = manager.classify_severities(ids, severities[t], t / fps)
+    return states
+
+
+def score_clip(centers, thresholds, labels, virtual_object, fps):
+    """Per-combination counts for one clip
+
+    centers is (mask combinations, frames, 2); every threshold pair is
+    classified for all frames at once. Frames without a labeled state are
+    compared with the states the same pair gives for the true positions,
+    so there the agreement measures the detection, not the thresholds.
+    Returns a (mask combinations, thresholds, 5) array of [labeled frames,
+    visible, detected, false positives, state agreement] and the
+    (mask combinations,) summed position error.
+    """
+    visible, truth, true_distances, labeled = labels
+    frames = centers.shape[1]
+    safe = np.array([pair[0] for pair in thresholds], dtype=np.float64)
+    danger = np.array([pair[1] for pair in thresholds], dtype=np.float64)
+    counts = np.zeros((len(centers), len(thresholds), 5))
+    errors = np.zeros(len(centers))
+    true_states = labeled[:, None]
+    if (labeled < 0).any():
+        true_states = np.where(true_states >= 0, true_states,
+                               classify_clip(true_distances, safe, danger, fps))
+
+    for index, raw in enumerate(centers):
+        positions = smooth_centers(raw)
+        detected = positions[:, 0] >= 0
+        distances = np.full(frames, np.inf)
+        if detected.any():
+            distances[detected] = virtual_object.calculate_distances(positions[detected])
+        states = classify_clip(distances, safe, danger, fps)
+
+        hits = visible & detected
+        counts[index, :, 0] = frames
+        counts[index, :, 1] = visible.sum()
+        counts[index, :, 2] = hits.sum()
+        counts[index, :, 3] = (~visible & detected).sum()
+        counts[index, :, 4] = (states == true_states).sum(axis=0)
+        errors[index] = np.hypot(*(positions[hits] - truth[hits]).T).sum()
+    return counts, errors
+
+
+def sweep(clips, grid, thresholds, workers=None, fps=None, shape="circle"):
+    """Score every combination on every clip, returns result rows, best first"""
+    virtual_object = VirtualObject(shape=shape)
+    workers = workers or os.cpu_count()
+
+    tasks = []
+    lengths = {}
+    for path in clips:
+        frames, clip_fps = clip_length(path)
+        lengths[path] = (frames, fps or clip_fps or TARGET_FPS)
+        step = max(1, -(-frames // (workers * SWEEP_TASKS_PER_WORKER)))
+        tasks.extend((path, start, min(frames, start + step), grid)
+                     for start in range(0, frames, step))
+
+    centers = {path: np.full((len(grid), lengths[path][0], 2), -1, dtype=np.int32)
+               for path in clips}
+    if workers > 1:
+        with mp.get_context("spawn").Pool(workers) as pool:
+            for path, start, block in pool.imap_unordered(evaluate_range, tasks):
+                centers[path][:, start:start + block.shape[1]] = block
+    else:
+        for path, start, block in map(evaluate_range, tasks):
+            centers[path][:, start:start + block.shape[1]] = block
+
+    counts = np.zeros((len(grid), len(thresholds), 5))
+    errors = np.zeros(len(grid))
+    for path in clips:
+        frames, clip_fps = lengths[path]
+        label_path = os.path.splitext(path)[0] + ".truth.csv"
+        labels = load_labels(label_path, frames, virtual_object)
+        clip_counts, clip_errors = score_clip(centers[path], thresholds, labels,
+                                              virtual_object, clip_fps)
+        counts += clip_counts
+        errors += clip_errors
+
+    rows = []
+    for (i, (lower, upper, kernel, iterations)), (j, (safe, danger)) in itertools.product(
+            enumerate(grid), enumerate(thresholds)):
+        frames, visible, detected, false_positives, agree = counts[i, j]
+        rows.append({
+            "lower": lower, "upper": upper, "kernel": kernel, "iterations": iterations,
+            "safe": safe, "danger": danger,
+            "detection_rate": detected / visible if visible else float('nan'),
+            "false_positives": int(false_positives),
+            "error_px": errors[i] / detected if detected else float('nan'),
+            "state_agreement": agree / frames if frames else float('nan'),
+        })
+    rows.sort(key=lambda r: (-r["state_agreement"], -r["detection_rate"], r["error_px"]))
+    return rows
+
+
+def save_rows(rows, path):
+    """Write the ranked results as CSV"""
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(dict(row, lower=" ".join(map(str, row["lower"])),
+                                 upper=" ".join(map(str, row["upper"]))))
+
+
+def parse_hsv(text):
+    """'h,s,v' -> (h, s, v)"""
+    values = tuple(int(v) for v in text.split(","))
+    if len(values) != 3:
+        raise argparse.ArgumentTypeError(f"Expected h,s,v: {text}")
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Rank skin, morphology and state threshold settings over labeled clips')
+    parser.add_argument('clips', nargs='+',
+                        help='Clips to score (video, .npy, .bgr or .y4m), each with a '
+                             '<name>.truth.csv label file')
+    parser.add_argument('--lower', type=parse_hsv, nargs='+', default=[SKIN_LOWER_HSV],
+                        metavar='H,S,V', help='Lower HSV skin bounds to try')
+    parser.add_argument('--upper', type=parse_hsv, nargs='+', default=[SKIN_UPPER_HSV],
+                        metavar='H,S,V', help='Upper HSV skin bounds to try')
+    parser.add_argument('--kernel', type=int, nargs='+', default=[KERNEL_SIZE[0]],
+                        help='Morphology kernel sizes to try')
+    parser.add_argument('--iterations', type=int, nargs='+', default=[ITERATIONS],
+                        help='Morphology iteration counts to try')
+    parser.add_argument('--safe', type=float, nargs='+', default=[SAFE_THRESHOLD],
+                        help='SAFE thresholds to try (pixels)')
+    parser.add_argument('--danger', type=float, nargs='+', default=[DANGER_THRESHOLD],
+                        help='DANGER thresholds to try (pixels)')
+    parser.add_argument('--shape', type=str, default='circle',
+                        choices=['circle', 'rectangle'], help='Virtual object shape')
+    parser.add_argument('--fps', type=float, help='Clip frame rate (default: from the clip)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='Worker processes')
+    parser.add_argument('--top', type=int, default=20, help='Rows printed')
+    parser.add_argument('--output', type=str, default='sweep.csv', help='Full ranked table (CSV)')
+    args = parser.parse_args()
+
+    grid = mask_grid(args.lower, args.upper, args.kernel, args.iterations)
+    thresholds = threshold_grid(args.safe, args.danger)
+    if not thresholds:
+        print("Error: No SAFE threshold above a DANGER threshold")
+        return
+    print(f"Sweeping {len(grid)} mask x {len(thresholds)} threshold combinations "
+          f"over {len(args.clips)} clip(s) on {args.workers} worker(s)")
+
+    start = time.time()
+    rows = sweep(args.clips, grid, thresholds, args.workers, args.fps, args.shape)
+    elapsed = time.time() - start
+    save_rows(rows, args.output)
+
+    print(f"{'lower':<13} {'upper':<13} {'kernel':>6} {'iter':>4} {'safe':>6} {'danger':>6}  "
+          f"{'detect':>7} {'fp':>5} {'error':>7} {'state':>7}")
+    for row in rows[:args.top]:
+        print(f"{','.join(map(str, row['lower'])):<13} {','.join(map(str, row['upper'])):<13} "
+              f"{row['kernel']:>6} {row['iterations']:>4} {row['safe']:>6.0f} {row['danger']:>6.0f}  "
+              f"{100 * row['detection_rate']:6.1f}% {row['false_positives']:>5} "
+              f"{row['error_px']:6.1f}px {100 * row['state_agreement']:6.1f}%")
+    print(f"\n{len(rows)} combinations scored in {elapsed:.1f}s, saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
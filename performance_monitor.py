@@ -2,34 +2,147 @@
 FPS monitoring and performance optimization
 """
 
+import csv
+import json
 import time
+from collections import deque
+from contextlib import nullcontext
 import cv2
+import numpy as np
 from config import *
 
+# Shared no-op span returned when profiling is disabled
+NULL_SPAN = nullcontext()
+
+class TimingSpan:
+    """Reusable context manager that times one named stage"""
+    __slots__ = ("monitor", "name", "start")
+
+    def __init__(self, monitor, name):
+        self.monitor = monitor
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.monitor.record(self.name, time.perf_counter() - self.start)
+        return False
+
 class PerformanceMonitor:
-    def __init__(self):
+    def __init__(self, profiling=False, window=PROFILE_WINDOW):
         self.frame_count = 0
         self.fps = 0
         self.start_time = time.time()
-        self.frame_times = []
+        self.frame_times = deque(maxlen=window)  # Seconds between update() calls
         self.target_fps = TARGET_FPS
-        
+
+        # Per-stage instrumentation (rolling window plus whole-run totals)
+        self.profiling = profiling
+        self.window = window
+        self.spans = {}
+        self.stage_times = {}
+        self.stage_totals = {}
+        self.last_times = {}  # Latest duration per stage, consumed by telemetry
+        self.last_update = None
+
     def update(self):
         """Update FPS calculation"""
+        now = time.perf_counter()
+        if self.last_update is not None:
+            self.frame_times.append(now - self.last_update)
+        self.last_update = now
+
         self.frame_count += 1
         elapsed = time.time() - self.start_time
-        
+
         if elapsed > 1.0:  # Update FPS every second
             self.fps = self.frame_count / elapsed
             self.frame_count = 0
             self.start_time = time.time()
-            
+
         return self.fps
-    
+
+    def span(self, name):
+        """Context manager timing a named stage (no-op unless profiling)"""
+        if not self.profiling:
+            return NULL_SPAN
+        span = self.spans.get(name)
+        if span is None:
+            span = self.spans[name] = TimingSpan(self, name)
+        return span
+
+    def record(self, name, seconds):
+        """Record one duration (seconds) for a named stage"""
+        times = self.stage_times.get(name)
+        if times is None:
+            times = self.stage_times[name] = deque(maxlen=self.window)
+            self.stage_totals[name] = [0, 0.0]
+        times.append(seconds)
+        self.last_times[name] = seconds
+        totals = self.stage_totals[name]
+        totals[0] += 1
+        totals[1] += seconds
+
+    def stage_stats(self, name):
+        """Latency statistics (milliseconds) of a stage over the rolling window"""
+        times = self.frame_times if name == "frame" else self.stage_times.get(name)
+        if not times:
+            return None
+        values = np.fromiter(times, dtype=np.float64) * 1000.0
+        p50, p95, p99 = np.percentile(values, (50, 95, 99))
+        if name == "frame":
+            count, total = len(values), values.sum() / 1000.0
+        else:
+            count, total = self.stage_totals[name]
+        return {
+            "stage": name,
+            "count": count,
+            "total_s": total,
+            "mean_ms": float(values.mean()),
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+            "max_ms": float(values.max()),
+        }
+
+    def histogram(self, name, bins=20):
+        """(counts, bin edges in ms) of a stage's rolling window"""
+        times = self.frame_times if name == "frame" else self.stage_times.get(name, ())
+        return np.histogram(np.fromiter(times, dtype=np.float64) * 1000.0, bins=bins)
+
+    def all_stats(self):
+        """Statistics for the frame time and every recorded stage"""
+        stats = [self.stage_stats("frame")]
+        stats += [self.stage_stats(name) for name in self.stage_times]
+        return [s for s in stats if s is not None]
+
+    def report(self):
+        """Print the per-stage latency table"""
+        print(f"{'Stage':<14}{'count':>7}{'mean':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  (ms)")
+        for s in self.all_stats():
+            print(f"{s['stage']:<14}{s['count']:>7}{s['mean_ms']:>9.2f}{s['p50_ms']:>9.2f}"
+                  f"{s['p95_ms']:>9.2f}{s['p99_ms']:>9.2f}{s['max_ms']:>9.2f}")
+
+    def export(self, path):
+        """Write stage statistics to a .json or .csv file"""
+        stats = self.all_stats()
+        if path.endswith(".csv"):
+            with open(path, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=list(stats[0]) if stats else ["stage"])
+                writer.writeheader()
+                writer.writerows(stats)
+        else:
+            with open(path, "w") as f:
+                json.dump({"target_fps": self.target_fps, "window": self.window,
+                           "stages": stats}, f, indent=2)
+
     def check_performance(self):
         """Check if performance meets target"""
         return self.fps >= self.target_fps
-    
+
     def adjust_processing(self, current_fps):
         """Dynamically adjust processing based on current FPS"""
         # Simple adaptive frame skipping
@@ -38,4 +151,7 @@ class PerformanceMonitor:
         elif current_fps > self.target_fps + 5:
             return 1  # Process all frames
         else:
-            return 1  # Default
\ No newline at end of file
+            return 1  # Default
+
+# Shared disabled monitor for components created without a profiler
+NULL_MONITOR = PerformanceMonitor(profiling=False)
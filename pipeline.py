@@ -0,0 +1,183 @@
+"""
+Threaded capture/process/render pipeline with bounded frame queues
+"""
+
+import threading
+import time
+from collections import deque
+from config import *
+
+
+class FrameRing:
+    """Bounded ring buffer that drops the oldest item when full
+
+    With block=True put() waits for room instead, for sources that are
+    not live (files) where every frame should be processed.
+    """
+
+    def __init__(self, capacity=PIPELINE_QUEUE_SIZE, block=False):
+        self.capacity = capacity
+        self.block = block
+        self.items = deque()
+        self.condition = threading.Condition()
+        self.closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        """Add an item, discarding the oldest one (or waiting) if the ring is full"""
+        with self.condition:
+            while self.block and len(self.items) >= self.capacity and not self.closed:
+                self.condition.wait()
+            if self.closed and self.block:
+                return
+            if len(self.items) >= self.capacity:
+                self.items.popleft()
+                self.dropped += 1
+            self.items.append(item)
+            self.condition.notify_all()
+
+    def get(self, timeout=None):
+        """Return the oldest item, or None once the ring is closed and empty"""
+        with self.condition:
+            while not self.items and not self.closed:
+                if not self.condition.wait(timeout):
+                    return None
+            if self.items:
+                item = self.items.popleft()
+                # Wake a producer waiting for room
+                self.condition.notify_all()
+                return item
+            return None
+
+    def close(self):
+        """Wake up all waiting consumers and stop accepting work"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class StageStats:
+    """Latency counters for a single pipeline stage"""
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.total_time = 0.0
+        self.last_time = 0.0
+        self.max_time = 0.0
+
+    def record(self, elapsed):
+        """Record the duration of one stage execution (seconds)"""
+        self.count += 1
+        self.total_time += elapsed
+        self.last_time = elapsed
+        if elapsed > self.max_time:
+            self.max_time = elapsed
+
+    def average_ms(self):
+        """Average stage latency in milliseconds"""
+        if self.count == 0:
+            return 0.0
+        return 1000.0 * self.total_time / self.count
+
+    def summary(self):
+        """One-line text summary of the stage"""
+        return (f"{self.name:<8} frames: {self.count:<6} avg: {self.average_ms():6.1f}ms "
+                f"max: {1000.0 * self.max_time:6.1f}ms")
+
+
+class TrackingPipeline:
+    """Runs capture, processing and rendering as concurrent stages
+
+    Capture and processing run on worker threads; rendering runs on the
+    calling thread because cv2.imshow/cv2.waitKey must stay on the main
+    thread. Stages are joined by FrameRing buffers that drop the oldest
+    frame, so processing always works on the most recent capture. Sources
+    that are not live (video files) are read as fast as the stages
+    consume them instead, without dropping frames.
+    """
+
+    def __init__(self, read_frame, process, render, queue_size=PIPELINE_QUEUE_SIZE, live=True):
+        # read_frame() -> (ret, frame), process(frame, capture_time) -> result,
+        # render(frame, result) -> False to stop the pipeline
+        self.read_frame = read_frame
+        self.process = process
+        self.render = render
+        self.capture_ring = FrameRing(queue_size, block=not live)
+        self.render_ring = FrameRing(queue_size, block=not live)
+        self.stop_event = threading.Event()
+        self.stats = {name: StageStats(name) for name in ("capture", "process", "render")}
+        self.threads = []
+
+    def _capture_loop(self):
+        stats = self.stats["capture"]
+        while not self.stop_event.is_set():
+            start = time.perf_counter()
+            ret, frame = self.read_frame()
+            if not ret:
+                print("End of video stream")
+                break
+            stats.record(time.perf_counter() - start)
+            self.capture_ring.put((frame, time.monotonic()))
+        self.capture_ring.close()
+
+    def _process_loop(self):
+        stats = self.stats["process"]
+        while not self.stop_event.is_set():
+            item = self.capture_ring.get()
+            if item is None:
+                break
+            frame, capture_time = item
+            start = time.perf_counter()
+            try:
+                result = self.process(frame, capture_time)
+            except Exception as e:
+                print(f"Processing error: {e}")
+                continue
+            stats.record(time.perf_counter() - start)
+            self.render_ring.put((frame, result))
+        self.render_ring.close()
+
+    def run(self):
+        """Start the worker stages and render on the calling thread until done"""
+        self.threads = [
+            threading.Thread(target=self._capture_loop, name="capture", daemon=True),
+            threading.Thread(target=self._process_loop, name="process", daemon=True),
+        ]
+        for thread in self.threads:
+            thread.start()
+
+        stats = self.stats["render"]
+        try:
+            while True:
+                item = self.render_ring.get()
+                if item is None:
+                    break
+                start = time.perf_counter()
+                keep_running = self.render(*item)
+                stats.record(time.perf_counter() - start)
+                if keep_running is False:
+                    break
+        finally:
+            self.stop()
+
+    def stop(self):
+        """Signal all stages to stop and wait for the worker threads"""
+        self.stop_event.set()
+        self.capture_ring.close()
+        self.render_ring.close()
+        for thread in self.threads:
+            thread.join(timeout=1.0)
+
+    def bottleneck(self):
+        """Name of the stage with the highest average latency"""
+        return max(self.stats.values(), key=lambda s: s.average_ms()).name
+
+    def report(self):
+        """Print per-stage latency counters"""
+        print("Pipeline stages:")
+        for stats in self.stats.values():
+            print(f"  {stats.summary()}")
+        print(f"  Dropped frames: capture->process {self.capture_ring.dropped}, "
+              f"process->render {self.render_ring.dropped}")
+        print(f"  Bottleneck stage: {self.bottleneck()}")
@@ -0,0 +1,113 @@
+"""
+Shared-memory frame ring for passing frames between processes without pickling
+"""
+
+import time
+import cv2
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+from config import *
+
+# Header layout (int64): [latest sequence, closed flag, consumed sequence, slot sequences...]
+_LATEST = 0
+_CLOSED = 1
+_CONSUMED = 2
+_SLOTS = 3
+
+
+class SharedFrameRing:
+    """Fixed-size ring of BGR frames living in a named shared memory block
+
+    A single writer fills slots in turn and publishes the sequence number of
+    the newest frame; readers get zero-copy NumPy views of the slot. A slot is
+    only reused after `slots - 1` newer frames, and readers can call
+    `is_current(seq)` to detect that a view has been (or is being)
+    overwritten meanwhile. For sources that are not live, a reader reports
+    the frames it is done with (`mark_consumed`) and the writer can wait
+    for it (`wait_consumed`) instead of running ahead.
+    """
+
+    def __init__(self, name=None, create=False, slots=SHARED_RING_SLOTS,
+                 width=FRAME_WIDTH, height=FRAME_HEIGHT, track=True):
+        self.slots = slots
+        self.frame_shape = (height, width, 3)
+        frame_bytes = height * width * 3
+        header_bytes = 8 * (_SLOTS + slots)
+
+        if create:
+            self.shm = shared_memory.SharedMemory(name=name, create=True,
+                                                  size=header_bytes + frame_bytes * slots)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            if not track:
+                # A reader in an unrelated process must not have its resource
+                # tracker unlink the writer's block when it exits
+                resource_tracker.unregister(self.shm._name, "shared_memory")
+        self.name = self.shm.name
+        self.owner = create
+
+        self.header = np.ndarray((_SLOTS + slots,), dtype=np.int64, buffer=self.shm.buf)
+        self.frames = np.ndarray((slots,) + self.frame_shape, dtype=np.uint8,
+                                 buffer=self.shm.buf, offset=header_bytes)
+        if create:
+            self.header[:] = -1
+            self.header[_CLOSED] = 0
+
+    def write(self, frame):
+        """Copy a frame into the next slot and publish it, returns its sequence number"""
+        seq = int(self.header[_LATEST]) + 1
+        slot = seq % self.slots
+        target = self.frames[slot]
+        # Invalidate the slot first, so a reader checking is_current() during
+        # the copy sees the old frame as overwritten (seqlock style)
+        self.header[_SLOTS + slot] = -1
+        if frame.shape == self.frame_shape:
+            np.copyto(target, frame)
+        else:
+            cv2.resize(frame, (self.frame_shape[1], self.frame_shape[0]), dst=target)
+        self.header[_SLOTS + slot] = seq
+        self.header[_LATEST] = seq
+        return seq
+
+    def latest(self):
+        """Return (sequence, frame view) of the newest frame, or (-1, None)"""
+        seq = int(self.header[_LATEST])
+        if seq < 0:
+            return -1, None
+        return seq, self.frames[seq % self.slots]
+
+    def is_current(self, seq):
+        """True while the slot holding `seq` has not been overwritten"""
+        return int(self.header[_SLOTS + seq % self.slots]) == seq
+
+    def mark_consumed(self, seq):
+        """Reader side: the frame `seq` has been processed"""
+        self.header[_CONSUMED] = seq
+
+    def wait_consumed(self, stop_event=None, poll_interval=0.001):
+        """Writer side: wait until the newest frame has been processed
+
+        Returns False if stop_event was set while waiting.
+        """
+        while int(self.header[_CONSUMED]) < int(self.header[_LATEST]):
+            if stop_event is not None and stop_event.is_set():
+                return False
+            time.sleep(poll_interval)
+        return True
+
+    def close_stream(self):
+        """Mark the stream as finished (no more frames will be written)"""
+        self.header[_CLOSED] = 1
+
+    @property
+    def closed(self):
+        return bool(self.header[_CLOSED])
+
+    def release(self):
+        """Detach from the shared memory block, removing it if we created it"""
+        # Drop our views first, the buffer cannot be closed while exported
+        self.header = None
+        self.frames = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -0,0 +1,114 @@
+"""
+Lookup-table skin classifier - precomputed BGR -> skin decision
+"""
+
+import os
+import copy
+import cv2
+import numpy as np
+from config import *
+
+
+class SkinLUT:
+    """Skin classifier backed by a quantized 3D BGR lookup table
+
+    The HSV thresholds are static, so the skin decision for every BGR color
+    can be computed once. Each channel is quantized to `bits` bits (8 bits
+    gives masks identical to cvtColor + inRange, fewer bits give a smaller,
+    approximate table) and classification becomes one vectorized gather.
+    The table is built on first use and cached to disk under a name derived
+    from the thresholds, so changing the config ranges triggers a rebuild.
+    """
+
+    def __init__(self, lower=SKIN_LOWER_HSV, upper=SKIN_UPPER_HSV,
+                 bits=SKIN_LUT_BITS, cache_dir=SKIN_LUT_CACHE_DIR):
+        self.lower = tuple(int(v) for v in lower)
+        self.upper = tuple(int(v) for v in upper)
+        self.bits = bits
+        self.shift = 8 - bits
+        self.cache_dir = cache_dir
+        self.table = None  # Flat uint8 table (0/255), built lazily
+        self.index = None  # Reused flat per-frame index buffers, grown to the largest image
+        self.channel = None
+
+    def cache_path(self):
+        """File the table for the current thresholds is cached in"""
+        key = "_".join(str(v) for v in self.lower + self.upper)
+        return os.path.join(self.cache_dir, f"skin_lut_{self.bits}b_{key}.npy")
+
+    def build(self):
+        """Compute the skin decision for every quantized BGR color"""
+        levels = 1 << self.bits
+        step = 1 << self.shift
+        # Classify the center color of each quantization bin
+        values = (np.arange(levels) * step + step // 2).astype(np.uint8)
+        table = np.empty((levels, levels, levels), dtype=np.uint8)
+
+        # One (G, R) plane per blue level keeps the temporary images small
+        plane = np.empty((levels, levels, 3), dtype=np.uint8)
+        plane[:, :, 1] = values[:, None]
+        plane[:, :, 2] = values[None, :]
+        for b in range(levels):
+            plane[:, :, 0] = values[b]
+            hsv = cv2.cvtColor(plane, cv2.COLOR_BGR2HSV)
+            cv2.inRange(hsv, self.lower, self.upper, dst=table[b])
+        return table.reshape(-1)
+
+    def load(self):
+        """Load the table from the disk cache, building and saving it if needed"""
+        path = self.cache_path()
+        size = 1 << (3 * self.bits)
+        if os.path.exists(path):
+            try:
+                packed = np.load(path)
+                self.table = np.unpackbits(packed)[:size] * np.uint8(255)
+                return self.table
+            except (OSError, ValueError) as e:
+                print(f"Skin LUT cache unreadable, rebuilding: {e}")
+
+        self.table = self.build()
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Stored as a bit array, 8x smaller than the in-memory byte table
+            np.save(path, np.packbits(self.table > 0))
+        except OSError as e:
+            print(f"Could not cache skin LUT: {e}")
+        return self.table
+
+    def worker(self):
+        """Classifier sharing this table with its own scratch buffers (for another thread)"""
+        if self.table is None:
+            self.load()
+        clone = copy.copy(self)
+        clone.index = clone.channel = None
+        return clone
+
+    def classify(self, frame, dst=None):
+        """Skin mask (0/255) for a BGR image of any shape (..., 3)"""
+        if self.table is None:
+            self.load()
+
+        shape = frame.shape[:-1]
+        size = int(np.prod(shape))
+        if self.index is None or self.index.size < size:
+            self.index = np.empty(size, dtype=np.int32)
+            self.channel = np.empty(size, dtype=np.int32)
+        # Smaller images (regions of interest) use the front of the buffers
+        index = self.index[:size].reshape(shape)
+        channel = self.channel[:size].reshape(shape)
+        if dst is None:
+            dst = np.empty(shape, dtype=np.uint8)
+
+        # index = (b << 2*bits) | (g << bits) | r on the quantized channels
+        np.copyto(index, frame[..., 0])
+        if self.shift:
+            np.right_shift(index, self.shift, out=index)
+        for c in (1, 2):
+            np.left_shift(index, self.bits, out=index)
+            np.copyto(channel, frame[..., c])
+            if self.shift:
+                np.right_shift(channel, self.shift, out=channel)
+            np.bitwise_or(index, channel, out=index)
+        # Indices are always in range, 'clip' skips numpy's bounds checking
+        np.take(self.table, index, out=dst, mode='clip')
+        return dst
@@ -2,6 +2,9 @@
 State management for SAFE/WARNING/DANGER classification
 """
 
+import time
+import numpy as np
+from collections import deque
 from config import *
 from enum import Enum
 
@@ -10,33 +13,175 @@ class State(Enum):
     WARNING = "WARNING"
     DANGER = "DANGER"
 
+# Ordering used when combining observed and predicted states
+SEVERITY = {State.SAFE: 0, State.WARNING: 1, State.DANGER: 2}
+
+# States and dwell times indexed by severity (SAFE is never entered by
+# escalation and never left by de-escalation)
+STATES = (State.SAFE, State.WARNING, State.DANGER)
+ENTER_DWELL = np.array([0.0, STATE_ENTER_DWELL["WARNING"], STATE_ENTER_DWELL["DANGER"]])
+EXIT_DWELL = np.array([0.0, STATE_EXIT_DWELL["WARNING"], STATE_EXIT_DWELL["DANGER"]])
+
 class StateManager:
-    def __init__(self):
+    """Debounced SAFE/WARNING/DANGER state driven by frame timestamps
+    
+    A more severe state is entered once it (or a more severe one) has been
+    observed for its enter dwell time; a state is left once the observations
+    have stayed below it for its exit dwell time. Being time based, the
+    alarm delay does not depend on the frame rate or frame skipping.
+    
+    `clock` is the clock the frame timestamps come from (time.monotonic for
+    live capture). Each transition's latency - from the capture of the
+    first frame that showed the change to the moment the transition is
+    emitted - is kept for reporting. With clock=None the timestamps are
+    media time (recorded clips) and only the dwell part is measured.
+    """
+    
+    def __init__(self, clock=time.monotonic):
         self.current_state = State.SAFE
-        self.state_counter = 0
-        self.state_persistence = 5  # Frames to persist state
+        self.raw_state = State.SAFE  # Last classification before hysteresis
+        self.clock = clock
+        self.above_since = [None] * len(STATES)  # Run start at or above each severity
+        self.below_since = None  # First frame below the current state
+        self.transition_latencies = deque(maxlen=PROFILE_WINDOW)  # (severity, seconds)
+        self.last_transition_latency = None
+        self.max_processing_delay = 0.0  # Capture to classification (s)
+        self.last_timestamp = None
+        self.max_frame_interval = None  # Largest gap between classified frames (s)
         
-    def classify_state(self, distance):
-        """Classify interaction state based on distance"""
+    @staticmethod
+    def state_for_distance(distance):
+        """Instantaneous state for a distance, without hysteresis"""
         if distance > SAFE_THRESHOLD:
-            new_state = State.SAFE
+            return State.SAFE
         # FIX: Ensure WARNING state covers the gap between SAFE and DANGER
         # DANGER state now only triggers when distance <= DANGER_THRESHOLD (30px)
         elif distance > DANGER_THRESHOLD:
-            new_state = State.WARNING
+            return State.WARNING
         else:
-            new_state = State.DANGER
+            return State.DANGER
+    
+    @staticmethod
+    def state_for_time_to_contact(time_to_contact):
+        """State implied by a predicted time to contact (seconds)"""
+        if time_to_contact <= TTC_DANGER:
+            return State.DANGER
+        elif time_to_contact <= TTC_WARNING:
+            return State.WARNING
+        return State.SAFE
+    
+    def _observe(self, timestamp):
+        """Track the largest gap between consecutive classified frames"""
+        if self.last_timestamp is not None:
+            interval = timestamp - self.last_timestamp
+            if self.max_frame_interval is None or interval > self.max_frame_interval:
+                self.max_frame_interval = interval
+        self.last_timestamp = timestamp
+    
+    def _now(self, timestamp):
+        """Emission time in the timestamp's clock, tracking the processing delay"""
+        if self.clock is None:
+            return timestamp
+        now = self.clock()
+        self.max_processing_delay = max(self.max_processing_delay, now - timestamp)
+        return now
+    
+    def classify_state(self, distance, time_to_contact=None, predicted_distance=None,
+                       timestamp=None):
+        """Classify interaction state based on distance
+        
+        With a motion model, the predicted distance and time to contact can
+        only escalate the observed state, so approaches are flagged early.
+        `timestamp` is the frame's capture time (defaults to now).
+        """
+        new_state = self.state_for_distance(distance)
+        if predicted_distance is not None:
+            new_state = max(new_state, self.state_for_distance(predicted_distance),
+                            key=SEVERITY.get)
+        if time_to_contact is not None:
+            new_state = max(new_state, self.state_for_time_to_contact(time_to_contact),
+                            key=SEVERITY.get)
+        self.raw_state = new_state
+        if timestamp is None:
+            timestamp = self.clock() if self.clock is not None else 0.0
+        self._observe(timestamp)
         
         # Add some hysteresis to prevent flickering
-        if new_state != self.current_state:
-            self.state_counter += 1
-            if self.state_counter >= self.state_persistence:
-                self.current_state = new_state
-                self.state_counter = 0
+        severity = SEVERITY[new_state]
+        current = SEVERITY[self.current_state]
+        for level in range(1, len(STATES)):
+            if severity < level:
+                self.above_since[level] = None
+            elif self.above_since[level] is None:
+                self.above_since[level] = timestamp
+        
+        target = since = None
+        for level in range(severity, current, -1):
+            if timestamp - self.above_since[level] >= ENTER_DWELL[level]:
+                target, since = level, self.above_since[level]
+                break
+        if severity < current:
+            if self.below_since is None:
+                self.below_since = timestamp
+            if timestamp - self.below_since >= EXIT_DWELL[current]:
+                target, since = severity, self.below_since
         else:
-            self.state_counter = 0
+            self.below_since = None
+        
+        now = self._now(timestamp)
+        if target is not None:
+            self.current_state = STATES[target]
+            self.below_since = None
+            self.last_transition_latency = now - since
+            self.transition_latencies.append((target, now - since))
         
         return self.current_state
+    
+    def latency_stats(self):
+        """Per-target-state transition latency statistics (ms)"""
+        stats = {}
+        if not self.transition_latencies:
+            return stats
+        records = np.array(self.transition_latencies)
+        for state, severity in SEVERITY.items():
+            latencies = records[records[:, 0] == severity, 1] * 1000.0
+            if len(latencies):
+                p50, p95 = np.percentile(latencies, (50, 95))
+                stats[state.value] = {"count": len(latencies), "p50_ms": float(p50),
+                                      "p95_ms": float(p95), "max_ms": float(latencies.max())}
+        return stats
+    
+    def alarm_latency_bound(self, max_frame_interval=None):
+        """Worst-case latency (s) from a hand entering the danger zone to DANGER
+        
+        While the hand stays in the zone, the next frame classified (at most
+        one frame interval later) starts the dwell; DANGER is emitted on the
+        first frame classified after the enter dwell has elapsed (at most one
+        more interval), once that frame has been processed. The interval
+        defaults to the largest gap between classified frames over the run,
+        which includes skipped and dropped frames.
+        """
+        if max_frame_interval is None:
+            max_frame_interval = self.max_frame_interval or 0.0
+        return ENTER_DWELL[SEVERITY[State.DANGER]] + 2 * max_frame_interval + self.max_processing_delay
+    
+    def latency_report(self, max_frame_interval=None):
+        """Print transition latencies and the worst-case alarm latency bound"""
+        if max_frame_interval is None:
+            max_frame_interval = self.max_frame_interval
+        print("State transition latency (first frame showing the change -> transition):")
+        stats = self.latency_stats()
+        if not stats:
+            print("  no transitions")
+        for name, s in stats.items():
+            print(f"  -> {name:<8} {s['count']:>4}x  p50 {s['p50_ms']:7.1f}ms  "
+                  f"p95 {s['p95_ms']:7.1f}ms  max {s['max_ms']:7.1f}ms")
+        if max_frame_interval is not None:
+            print(f"  Worst-case alarm latency bound: "
+                  f"{1000.0 * self.alarm_latency_bound(max_frame_interval):.0f}ms "
+                  f"(DANGER dwell {1000.0 * STATE_ENTER_DWELL['DANGER']:.0f}ms, "
+                  f"max frame interval {1000.0 * max_frame_interval:.0f}ms, "
+                  f"max processing delay {1000.0 * self.max_processing_delay:.0f}ms)")
 
     def get_state_color(self):
         """Get color corresponding to current state"""
@@ -49,4 +194,95 @@ class StateManager:
     
     def get_state_text(self):
         """Get text representation of current state"""
-        return self.current_state.value
\ No newline at end of file
+        return self.current_state.value
+
+
+class MultiStateManager(StateManager):
+    """StateManager for any number of tracked hands, classified together
+    
+    Per-hand state and hysteresis counters live in parallel NumPy arrays
+    keyed by hand ID, so a frame costs a handful of array operations no
+    matter how many hands there are. A hand that disappears is treated as
+    infinitely far away until its state has decayed back to SAFE, exactly
+    like the single-hand manager when it loses the hand. current_state is
+    the most severe state among all hands; transition latencies are
+    recorded per hand.
+    """
+    
+    STATES = STATES
+    COLORS = np.array([COLOR_SAFE, COLOR_WARNING, COLOR_DANGER])
+    
+    def __init__(self, clock=time.monotonic):
+        super().__init__(clock)
+        self.ids = np.empty(0, dtype=np.int64)
+        self.states = np.empty(0, dtype=np.int8)  # Severity per hand
+        self.above = np.empty((0, len(STATES)))  # Run start per hand and severity, NaN if none
+        self.below = np.empty(0)  # De-escalation start per hand, NaN if none
+    
+    @staticmethod
+    def severity_for_distances(distances):
+        """Instantaneous severities for an array of distances, without hysteresis"""
+        distances = np.asarray(distances, dtype=np.float64)
+        return np.where(distances > SAFE_THRESHOLD, 0,
+                        np.where(distances > DANGER_THRESHOLD, 1, 2)).astype(np.int8)
+    
+    def classify_states(self, ids, distances, timestamp=None):
+        """Classify all hands at once, returns their (N,) severities"""
+        return self.classify_severities(ids, self.severity_for_distances(distances), timestamp)
+    
+    def classify_severities(self, ids, new, timestamp=None):
+        """classify_states for instantaneous (N,) int8 severities computed by the caller"""
+        if timestamp is None:
+            timestamp = self.clock() if self.clock is not None else 0.0
+        self._observe(timestamp)
+        ids = np.asarray(ids, dtype=np.int64)
+        count = len(new)
+        self.raw_state = self.STATES[new.max()] if len(new) else State.SAFE
+        
+        # Hands that vanished but are not SAFE yet are carried as far away
+        gone = ~np.isin(self.ids, ids) & (self.states > 0)
+        ids = np.concatenate([ids, self.ids[gone]])
+        new = np.concatenate([new, np.zeros(int(gone.sum()), dtype=np.int8)])
+        
+        # Look up each hand's previous state by ID
+        states = np.zeros(len(ids), dtype=np.int8)
+        above = np.full((len(ids), len(STATES)), np.nan)
+        below = np.full(len(ids), np.nan)
+        if len(self.ids):
+            order = np.argsort(self.ids)
+            slots = order[np.minimum(np.searchsorted(self.ids, ids, sorter=order),
+                                     len(self.ids) - 1)]
+            known = self.ids[slots] == ids
+            states[known] = self.states[slots[known]]
+            above[known] = self.above[slots[known]]
+            below[known] = self.below[slots[known]]
+        
+        # Same dwell-time hysteresis as classify_state, for every hand at once
+        levels = np.arange(len(STATES))
+        observed = new[:, None] >= levels
+        above = np.where(observed, np.where(np.isnan(above), timestamp, above), np.nan)
+        ready = observed & (levels > states[:, None]) & (timestamp - above >= ENTER_DWELL)
+        switch_up = ready.any(axis=1)
+        up_level = len(STATES) - 1 - np.argmax(ready[:, ::-1], axis=1)  # Most severe ready
+        down = new < states
+        below = np.where(down, np.where(np.isnan(below), timestamp, below), np.nan)
+        switch_down = down & (timestamp - below >= EXIT_DWELL[states])
+        switch = switch_up | switch_down
+        
+        now = self._now(timestamp)
+        if switch.any():
+            target = np.where(switch_down, new, up_level)[switch]
+            since = np.where(switch_down, below, above[np.arange(len(ids)), up_level])[switch]
+            self.transition_latencies.extend(zip(target.tolist(), (now - since).tolist()))
+            self.last_transition_latency = float(now - since.min())
+            states[switch] = target
+            below[switch] = np.nan
+        
+        self.ids, self.states = ids, states
+        self.above, self.below = above, below
+        self.current_state = self.STATES[states.max()] if len(states) else State.SAFE
+        return states[:count]
+    
+    def state_colors(self, severities):
+        """(N, 3) BGR colors for an array of severities"""
+        return self.COLORS[severities]
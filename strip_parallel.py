@@ -0,0 +1,62 @@
+"""
+Intra-frame parallelism: per-pixel image chains run on horizontal strips
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from buffer_arena import BufferArena
+
+
+def chain_halo(blur_size, kernel_size, iterations):
+    """Rows of context the blur -> threshold -> erode/dilate -> blur chain needs
+
+    Each filter reads up to its radius beyond the row it writes, so the
+    footprints add up: the input blur, the erosions, the dilations and the
+    mask blur (the threshold is per pixel and needs none).
+    """
+    blur = blur_size[1] // 2
+    morphology = (kernel_size[1] // 2) * iterations
+    return blur + 2 * morphology + blur
+
+
+class StripPool:
+    """Thread pool running a per-strip function over horizontal frame strips
+
+    Every strip is extended by `halo` rows of real neighbouring pixels on
+    each side, so the rows it owns see exactly the same input as in a
+    whole-frame call; strips at the frame edges see the true image border.
+    The stitched result is therefore bit-identical to the serial path.
+    OpenCV releases the GIL inside its calls, so strips run concurrently.
+    Each strip has its own BufferArena for intermediate images.
+    """
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="strip")
+        self.arenas = [BufferArena() for _ in range(workers)]
+
+    def strips(self, height, halo):
+        """(owned start, owned end, padded start, padded end) rows of each strip"""
+        count = max(1, min(self.workers, height // max(1, 2 * halo)))
+        bounds = [height * i // count for i in range(count + 1)]
+        return [(y0, y1, max(0, y0 - halo), min(height, y1 + halo))
+                for y0, y1 in zip(bounds[:-1], bounds[1:])]
+
+    def run(self, process, height, halo):
+        """Call process(worker, y0, y1, h0, h1) for every strip, in parallel
+
+        process writes the owned rows [y0, y1) of its result, computed from
+        the padded rows [h0, h1) of its input; worker indexes self.arenas
+        (and any other per-worker state of the caller).
+        """
+        strips = self.strips(height, halo)
+        if len(strips) == 1:
+            process(0, *strips[0])
+            return
+        futures = [self.executor.submit(process, worker, *strip)
+                   for worker, strip in enumerate(strips)]
+        for future in futures:
+            future.result()
+
+    def close(self):
+        """Stop the worker threads"""
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,183 @@
+"""
+Deterministic synthetic hand-motion clips with ground truth for benchmarks and tests
+"""
+
+import argparse
+import cv2
+import numpy as np
+from config import *
+
+# Skin-like BGR color well inside SKIN_LOWER_HSV/SKIN_UPPER_HSV
+HAND_COLOR = (120, 160, 220)
+
+BACKGROUNDS = ("plain", "gradient", "clutter")
+TRAJECTORIES = ("approach", "pass", "circle", "idle")
+
+
+def trajectory(kind, frames, rng):
+    """Scripted (x, y) hand centers, or None where the hand is out of view"""
+    cx, cy = VIRTUAL_OBJECT_CENTER
+    t = np.linspace(0.0, 1.0, frames)
+    if kind == "approach":
+        # From the left edge straight into the object and back out
+        x = 60 + (cx - 60) * np.sin(np.pi * t)
+        y = np.full(frames, cy) + 20 * np.sin(4 * np.pi * t)
+    elif kind == "pass":
+        # Diagonal sweep that grazes the warning zone
+        x = 40 + (FRAME_WIDTH - 80) * t
+        y = 60 + (FRAME_HEIGHT - 120) * t
+    elif kind == "circle":
+        # Orbit around the object at a varying radius
+        radius = VIRTUAL_OBJECT_RADIUS + 40 + 80 * (0.5 + 0.5 * np.cos(2 * np.pi * t))
+        x = cx + radius * np.cos(4 * np.pi * t)
+        y = cy + radius * np.sin(4 * np.pi * t)
+    elif kind == "idle":
+        # Nobody in front of the camera for most of the clip
+        x = np.full(frames, 80.0)
+        y = np.full(frames, 80.0)
+    else:
+        raise ValueError(f"Unknown trajectory: {kind}")
+
+    points = [(int(px), int(py)) for px, py in zip(x, y)]
+    if kind == "idle":
+        visible = (t > 0.8)
+        points = [p if v else None for p, v in zip(points, visible)]
+    # Small deterministic jitter like a real hand
+    jitter = rng.integers(-2, 3, size=(frames, 2))
+    return [None if p is None else (p[0] + int(j[0]), p[1] + int(j[1]))
+            for p, j in zip(points, jitter)]
+
+
+def make_background(kind, rng):
+    """Static background image for a clip"""
+    if kind == "plain":
+        return np.full((FRAME_HEIGHT, FRAME_WIDTH, 3), (60, 90, 40), dtype=np.uint8)
+    if kind == "gradient":
+        ramp = np.linspace(30, 200, FRAME_WIDTH, dtype=np.float32)
+        background = np.empty((FRAME_HEIGHT, FRAME_WIDTH, 3), dtype=np.uint8)
+        background[:, :, 0] = ramp[None, :]
+        background[:, :, 1] = ramp[::-1][None, :] * 0.6
+        background[:, :, 2] = 40
+        return background
+    if kind == "clutter":
+        # Random non-skin rectangles (blue/green dominant)
+        background = np.full((FRAME_HEIGHT, FRAME_WIDTH, 3), (70, 70, 70), dtype=np.uint8)
+        for _ in range(25):
+            x, y = rng.integers(0, FRAME_WIDTH), rng.integers(0, FRAME_HEIGHT)
+            w, h = rng.integers(20, 120), rng.integers(20, 120)
+            color = (int(rng.integers(100, 255)), int(rng.integers(60, 200)), int(rng.integers(0, 60)))
+            cv2.rectangle(background, (int(x), int(y)), (int(x + w), int(y + h)), color, -1)
+        return background
+    raise ValueError(f"Unknown background: {kind}")
+
+
+class SyntheticClip:
+    """Frames and ground truth of one synthetic clip, generated lazily"""
+
+    def __init__(self, frames=120, trajectory_kind="approach", background="plain",
+                 noise=4.0, seed=0):
+        self.frames = frames
+        self.trajectory_kind = trajectory_kind
+        self.background_kind = background
+        self.noise = noise
+        self.seed = seed
+        rng = np.random.default_rng(seed)
+        self.background = make_background(background, rng)
+        self.positions = trajectory(trajectory_kind, frames, rng)
+        self.centroid_offset = self._centroid_offset()
+
+    @property
+    def name(self):
+        return f"{self.trajectory_kind}-{self.background_kind}-n{self.noise:g}-s{self.seed}"
+
+    def __len__(self):
+        return self.frames
+
+    @staticmethod
+    def draw_hand(image, position, color=HAND_COLOR):
+        """Palm plus a raised finger"""
+        cv2.ellipse(image, position, (38, 52), 0, 0, 360, color, -1)
+        cv2.rectangle(image, (position[0] - 6, position[1] - 95),
+                      (position[0] + 6, position[1] - 40), color, -1)
+
+    def _centroid_offset(self):
+        # Offset of the hand blob's centroid from its palm center
+        canvas = np.zeros((300, 300), dtype=np.uint8)
+        self.draw_hand(canvas, (150, 150), 255)
+        m = cv2.moments(canvas, binaryImage=True)
+        return (m["m10"] / m["m00"] - 150, m["m01"] / m["m00"] - 150)
+
+    def frame(self, index):
+        """Render frame `index` (same output for the same clip parameters)"""
+        frame = self.background.copy()
+        position = self.positions[index]
+        if position is not None:
+            self.draw_hand(frame, position)
+        if self.noise > 0:
+            rng = np.random.default_rng((self.seed, index))
+            noise = rng.normal(0.0, self.noise, frame.shape)
+            frame = np.clip(frame + noise, 0, 255).astype(np.uint8)
+        return frame
+
+    def __iter__(self):
+        for index in range(self.frames):
+            yield self.frame(index)
+
+    def hand_center(self, index):
+        """Expected tracked position (centroid of the hand blob), or None"""
+        position = self.positions[index]
+        if position is None:
+            return None
+        return (position[0] + self.centroid_offset[0], position[1] + self.centroid_offset[1])
+
+    def fingertip(self, index):
+        """Expected fingertip position (top of the raised finger), or None"""
+        position = self.positions[index]
+        if position is None:
+            return None
+        return (position[0], position[1] - 95)
+
+    def write(self, path, fps=15):
+        """Save the clip as a video file (MJPG) and its ground truth as CSV"""
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps,
+                                 (FRAME_WIDTH, FRAME_HEIGHT))
+        try:
+            for frame in self:
+                writer.write(frame)
+        finally:
+            writer.release()
+        with open(path.rsplit(".", 1)[0] + ".truth.csv", "w") as f:
+            f.write("frame,x,y\n")
+            for index in range(self.frames):
+                center = self.hand_center(index)
+                x, y = (f"{center[0]:.1f}", f"{center[1]:.1f}") if center is not None else ("", "")
+                f.write(f"{index},{x},{y}\n")
+
+
+def standard_clips(frames=120):
+    """The fixed set of clips used by the benchmark suite"""
+    return [
+        SyntheticClip(frames, "approach", "plain", noise=2.0, seed=1),
+        SyntheticClip(frames, "pass", "gradient", noise=4.0, seed=2),
+        SyntheticClip(frames, "circle", "clutter", noise=6.0, seed=3),
+        SyntheticClip(frames, "idle", "clutter", noise=4.0, seed=4),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic hand-motion clip')
+    parser.add_argument('output', type=str, help='Output video file (.avi)')
+    parser.add_argument('--frames', type=int, default=120)
+    parser.add_argument('--trajectory', type=str, default='approach', choices=TRAJECTORIES)
+    parser.add_argument('--background', type=str, default='plain', choices=BACKGROUNDS)
+    parser.add_argument('--noise', type=float, default=4.0, help='Gaussian noise sigma')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    clip = SyntheticClip(args.frames, args.trajectory, args.background, args.noise, args.seed)
+    clip.write(args.output)
+    print(f"Wrote {clip.frames} frames of '{clip.name}' to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
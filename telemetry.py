@@ -0,0 +1,254 @@
+"""
+Per-frame telemetry log in memory-mapped NumPy segments, with a loader for queries
+"""
+
+import os
+import glob
+import time
+import argparse
+import numpy as np
+from config import *
+from state_manager import State, SEVERITY
+
+# One fixed-width record per processed frame; unused (preallocated) records
+# have time == 0
+TELEMETRY_DTYPE = np.dtype([
+    ("time", np.float64),      # Wall clock (seconds since the epoch)
+    ("frame", np.uint32),
+    ("x", np.int16),           # Hand position, -1 when no hand
+    ("y", np.int16),
+    ("area", np.float32),      # Hand contour area (frame pixels)
+    ("distance", np.float32),  # inf when no hand
+    ("raw_state", np.int8),    # Severity before hysteresis
+    ("state", np.int8),        # Debounced severity
+    ("frame_ms", np.float32),  # Time between frames
+    ("stage_ms", np.float32, (len(TELEMETRY_STAGES),)),  # NaN if a stage did not run
+])
+
+# States indexed by severity
+STATE_NAMES = [state.value for state in sorted(SEVERITY, key=SEVERITY.get)]
+
+
+class TelemetryRecorder:
+    """Appends records to preallocated memory-mapped segment files
+
+    A segment is an .npy file of `segment_frames` records created up front,
+    so recording a frame is a single structured-array assignment into the
+    mapping - no allocation, encoding or system call. When a segment is
+    full the next one is started; the OS writes dirty pages back on its own.
+    """
+
+    def __init__(self, directory=TELEMETRY_DIR, segment_frames=TELEMETRY_SEGMENT_FRAMES,
+                 stages=TELEMETRY_STAGES):
+        self.directory = directory
+        self.segment_frames = segment_frames
+        self.stages = stages
+        self.stage_ms = np.full(len(stages), np.nan, dtype=np.float32)
+        self.segment = None
+        self.path = None
+        self.count = 0
+        self.frame = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _open_segment(self):
+        self.close()
+        name = time.strftime("telemetry-%Y%m%d-%H%M%S")
+        path = os.path.join(self.directory, f"{name}.npy")
+        suffix = 1
+        while os.path.exists(path):
+            path = os.path.join(self.directory, f"{name}-{suffix}.npy")
+            suffix += 1
+        self.segment = np.lib.format.open_memmap(path, mode="w+", dtype=TELEMETRY_DTYPE,
+                                                 shape=(self.segment_frames,))
+        self.path = path
+        self.count = 0
+
+    def record(self, hand_position, area, distance, raw_state, state, frame_time, stage_times):
+        """Append one frame
+
+        stage_times maps stage names to their last duration (seconds); it is
+        emptied so a stage that does not run next frame is logged as NaN.
+        """
+        if self.segment is None or self.count >= self.segment_frames:
+            self._open_segment()
+        stage_ms = self.stage_ms
+        for i, name in enumerate(self.stages):
+            seconds = stage_times.pop(name, None)
+            stage_ms[i] = np.nan if seconds is None else seconds * 1000.0
+        if hand_position is None:
+            x = y = -1
+        else:
+            x, y = hand_position
+        self.segment[self.count] = (time.time(), self.frame, x, y, area, distance,
+                                    SEVERITY[raw_state], SEVERITY[state],
+                                    frame_time * 1000.0, stage_ms)
+        self.count += 1
+        self.frame += 1
+
+    def close(self):
+        """Flush and close the current segment"""
+        if self.segment is not None:
+            self.segment.flush()
+            self.segment = None
+
+
+class TelemetryLog:
+    """Read-only view over telemetry segments with vectorized queries
+
+    Segments are memory-mapped, so opening a day of logs reads the file
+    headers and a binary search's worth of time values per segment; a
+    query touches only the columns it uses.
+    """
+
+    def __init__(self, paths, start=None, end=None):
+        """Records of the given segment files, optionally only start <= time < end"""
+        self.paths = sorted(paths)
+        self.segments = []
+        for path in self.paths:
+            segment = np.load(path, mmap_mode="r")
+            used = self.used_records(segment)
+            if not used:
+                continue
+            segment = segment[:used]
+            # Times increase within a segment, so the range is a bisection away
+            times = segment["time"]
+            first = 0 if start is None else int(np.searchsorted(times, start, side="left"))
+            last = used if end is None else int(np.searchsorted(times, end, side="left"))
+            if first < last:
+                self.segments.append(segment[first:last])
+        self.segments.sort(key=lambda segment: segment["time"][0])
+
+    @staticmethod
+    def used_records(segment):
+        """Number of records written to a segment
+
+        Records are filled from the start and unused ones have time == 0,
+        so the first unused record is found by bisection.
+        """
+        times = segment["time"]
+        low, high = 0, len(times)
+        while low < high:
+            middle = (low + high) // 2
+            if times[middle] > 0:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    @classmethod
+    def open_day(cls, directory=TELEMETRY_DIR, day=None):
+        """All records of a local calendar day ("YYYYMMDD", default today)
+
+        Segments are selected by their record times, so the part of a
+        segment started the day before that runs past midnight is included
+        and records after midnight are left out.
+        """
+        day = day or time.strftime("%Y%m%d")
+        midnight = time.strptime(day, "%Y%m%d")
+        start = time.mktime(midnight)
+        # mktime normalizes day + 1 and picks the offset in effect then (DST)
+        end = time.mktime((midnight.tm_year, midnight.tm_mon, midnight.tm_mday + 1,
+                           0, 0, 0, 0, 0, -1))
+        # Segments named after later days cannot hold records of this one
+        paths = [path for path in glob.glob(os.path.join(directory, "telemetry-*.npy"))
+                 if os.path.basename(path)[10:18] <= day]
+        return cls(paths, start, end)
+
+    def __len__(self):
+        return sum(len(segment) for segment in self.segments)
+
+    def column(self, name):
+        """One field of all records, in time order"""
+        if not self.segments:
+            return np.empty((0,) + TELEMETRY_DTYPE[name].shape, dtype=TELEMETRY_DTYPE[name].base)
+        return np.concatenate([segment[name] for segment in self.segments])
+
+    def frame_durations(self):
+        """Seconds each record stands for, gaps longer than TELEMETRY_MAX_GAP cut off"""
+        times = self.column("time")
+        if len(times) == 0:
+            return times
+        durations = np.diff(times, append=times[-1])
+        return np.clip(durations, 0.0, TELEMETRY_MAX_GAP)
+
+    def time_in_states(self, field="state"):
+        """Seconds spent in each state, {"SAFE": s, "WARNING": s, "DANGER": s}"""
+        totals = np.bincount(self.column(field), weights=self.frame_durations(),
+                             minlength=len(STATE_NAMES))
+        return dict(zip(STATE_NAMES, totals.tolist()))
+
+    def transitions(self):
+        """(times, from severities, to severities) of debounced state changes"""
+        times = self.column("time")
+        states = self.column("state")
+        changed = np.flatnonzero(states[1:] != states[:-1]) + 1
+        return times[changed], states[changed - 1], states[changed]
+
+    def latency(self, stage="frame"):
+        """Latencies (ms) of the frame time or one stage, NaN where it did not run"""
+        if stage == "frame":
+            return self.column("frame_ms")
+        return self.column("stage_ms")[:, TELEMETRY_STAGES.index(stage)]
+
+    def latency_by_hour(self, stage="frame", percentiles=(50, 95, 99)):
+        """(hour start times, (hours, len(percentiles)) latencies in ms)
+
+        Hours are local clock hours, with each record's own UTC offset so
+        logs across a DST change are bucketed correctly. Percentiles use
+        linear interpolation like np.percentile, computed for all hours at
+        once on one sort.
+        """
+        times = self.column("time")
+        values = self.latency(stage).astype(np.float64)
+        valid = ~np.isnan(values)
+        times, values = times[valid], values[valid]
+        if len(values) == 0:
+            return np.empty(0), np.empty((0, len(percentiles)))
+
+        # UTC offset of every record, looked up once per distinct UTC hour
+        utc_hours, inverse = np.unique((times // 3600).astype(np.int64), return_inverse=True)
+        offsets = np.array([time.localtime(hour * 3600).tm_gmtoff for hour in utc_hours.tolist()],
+                           dtype=np.float64)[inverse]
+        # Start of each record's local hour as a timestamp; unique per bucket
+        # even when a local hour repeats at the end of DST
+        hours = ((times + offsets) // 3600) * 3600 - offsets
+        order = np.lexsort((values, hours))
+        hours, values = hours[order], values[order]
+        starts = np.flatnonzero(np.r_[True, hours[1:] != hours[:-1]])
+        counts = np.diff(np.r_[starts, len(values)])
+
+        # Fractional rank of each percentile inside each hour's sorted run
+        ranks = (np.asarray(percentiles, dtype=np.float64) / 100.0)[None, :] * (counts[:, None] - 1)
+        lower = np.floor(ranks).astype(np.int64)
+        upper = np.minimum(lower + 1, counts[:, None] - 1)
+        weight = ranks - lower
+        low_values = values[starts[:, None] + lower]
+        high_values = values[starts[:, None] + upper]
+        result = low_values + (high_values - low_values) * weight
+        return hours[starts], result
+
+    def summary(self):
+        """Print time per state, transitions and hourly frame latency"""
+        print(f"Records: {len(self)} in {len(self.segments)} segment(s)")
+        if not len(self):
+            return
+        for name, seconds in self.time_in_states().items():
+            print(f"  {name:<8} {seconds:10.1f}s")
+        times, _, to_states = self.transitions()
+        print(f"  Transitions: {len(times)} ({int(np.sum(to_states == SEVERITY[State.DANGER]))} into DANGER)")
+        hours, latencies = self.latency_by_hour()
+        print("  Hour   frame p50/p95/p99 (ms)")
+        for hour, (p50, p95, p99) in zip(hours, latencies):
+            print(f"  {time.strftime('%H:00', time.localtime(hour))}  {p50:6.1f} {p95:6.1f} {p99:6.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Summarize a day of tracking telemetry')
+    parser.add_argument('--dir', type=str, default=TELEMETRY_DIR, help='Telemetry directory')
+    parser.add_argument('--day', type=str, help='Day to load (YYYYMMDD, default today)')
+    args = parser.parse_args()
+    TelemetryLog.open_day(args.dir, args.day).summary()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+Background recording of the annotated output (continuous or around DANGER)
+"""
+
+import os
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+from config import *
+from state_manager import State
+
+
+class VideoRecorder:
+    """Encodes annotated frames with cv2.VideoWriter on a background thread
+
+    write() only copies the frame into a preallocated buffer and queues it;
+    encoding happens on the recorder thread (OpenCV releases the GIL while
+    encoding). There is a fixed number of buffers: when the encoder falls
+    `queue_size` frames behind, new frames are dropped instead of blocking
+    the tracking loop.
+
+    mode "continuous" records everything into one file. Mode "danger" keeps
+    the last `pre_seconds` of frames in a pre-trigger ring and writes a clip
+    from there whenever the state becomes DANGER, until `post_seconds` after
+    the last DANGER frame.
+
+    Clips are written at `fps` while the render rate varies, so frames are
+    placed by their timestamps: a frame is repeated to cover a slow render
+    and skipped when several arrive within one clip frame, and clips play
+    back in real time.
+    """
+
+    def __init__(self, mode="danger", directory=RECORD_DIR, fps=RECORD_FPS, codec=RECORD_CODEC,
+                 pre_seconds=RECORD_PRE_SECONDS, post_seconds=RECORD_POST_SECONDS,
+                 queue_size=RECORD_QUEUE_SIZE):
+        if mode not in ("danger", "continuous"):
+            raise ValueError(f"Unknown recording mode: {mode}")
+        self.mode = mode
+        self.directory = directory
+        self.fps = fps
+        self.interval = 1.0 / fps
+        self.fourcc = cv2.VideoWriter_fourcc(*codec)
+        self.post_seconds = post_seconds
+        self.pre_seconds = pre_seconds
+        self.pre_frames = int(round(pre_seconds * fps)) + 1 if mode == "danger" else 0
+        self.queue_size = queue_size
+        self.shape = None
+        self.free = deque()         # Buffers available to write()
+        self.pre_ring = deque()     # (timestamp, buffer) before a trigger (danger mode)
+        self.queue = deque()        # ("open", path) / ("frame", (buffer, repeat)) / ("close", None)
+        self.condition = threading.Condition()
+        self.recording = False
+        self.clip_start = 0.0       # Timestamp of the clip's first frame
+        self.clip_frames = 0        # Frames of the current clip written or queued
+        self.last_danger = 0.0
+        self.clips = []
+        self.written = 0
+        self.dropped = 0
+        os.makedirs(directory, exist_ok=True)
+        self.thread = threading.Thread(target=self._run, name="recorder", daemon=True)
+        self.thread.start()
+
+    def _allocate(self, shape):
+        self.shape = shape
+        count = self.pre_frames + self.queue_size
+        self.free.extend(np.empty(shape, dtype=np.uint8) for _ in range(count))
+
+    def _put(self, kind, item=None):
+        with self.condition:
+            self.queue.append((kind, item))
+            self.condition.notify()
+
+    def _repeat(self, timestamp):
+        """How many clip frames a frame captured at timestamp covers (0 to skip it)"""
+        target = int((timestamp - self.clip_start) / self.interval) + 1
+        repeat = max(0, target - self.clip_frames)
+        self.clip_frames += repeat
+        return repeat
+
+    def _start_clip(self, now):
+        name = f"{self.mode}-{time.strftime('%Y%m%d-%H%M%S')}"
+        path = os.path.join(self.directory, f"{name}.avi")
+        suffix = 1
+        while os.path.exists(path) or path in self.clips:
+            path = os.path.join(self.directory, f"{name}-{suffix}.avi")
+            suffix += 1
+        self.clips.append(path)
+        self.recording = True
+        self.clip_start = self.pre_ring[0][0] if self.pre_ring else now
+        self.clip_frames = 0
+        with self.condition:
+            self.queue.append(("open", path))
+            # The pre-trigger frames start the clip
+            while self.pre_ring:
+                timestamp, buffer = self.pre_ring.popleft()
+                self.queue.append(("frame", (buffer, self._repeat(timestamp))))
+            self.condition.notify()
+
+    def _stop_clip(self):
+        self.recording = False
+        self._put("close")
+
+    def write(self, frame, state=None, timestamp=None):
+        """Offer one annotated frame (never blocks), with the current state
+
+        `timestamp` is the frame's time (time.monotonic()); defaults to now.
+        """
+        if self.shape is None:
+            self._allocate(frame.shape)
+        elif frame.shape != self.shape:
+            self.dropped += 1
+            return
+
+        now = time.monotonic() if timestamp is None else timestamp
+        if self.mode == "continuous":
+            if not self.recording:
+                self._start_clip(now)
+        elif state == State.DANGER:
+            self.last_danger = now
+            if not self.recording:
+                self._start_clip(now)
+        elif self.recording and now - self.last_danger > self.post_seconds:
+            self._stop_clip()
+
+        if self.recording:
+            repeat = self._repeat(now)
+            if not repeat:
+                # Still within the clip frame of the previous one
+                return
+            try:
+                buffer = self.free.popleft()
+            except IndexError:
+                # Encoder is queue_size frames behind: drop, do not wait; the
+                # next frame covers the gap
+                self.clip_frames -= repeat
+                self.dropped += 1
+                return
+            np.copyto(buffer, frame)
+            self._put("frame", (buffer, repeat))
+            return
+
+        # Idle: keep pre_seconds of frames, at most one per clip frame
+        if not self.pre_frames:
+            return
+        while self.pre_ring and now - self.pre_ring[0][0] > self.pre_seconds:
+            self.free.append(self.pre_ring.popleft()[1])
+        if self.pre_ring and now - self.pre_ring[-1][0] < self.interval:
+            return
+        if len(self.pre_ring) >= self.pre_frames or not self.free:
+            buffer = self.pre_ring.popleft()[1] if self.pre_ring else None
+        else:
+            buffer = self.free.popleft()
+        if buffer is None:
+            return
+        np.copyto(buffer, frame)
+        self.pre_ring.append((now, buffer))
+
+    def _run(self):
+        writer = None
+        while True:
+            with self.condition:
+                while not self.queue:
+                    self.condition.wait()
+                kind, item = self.queue.popleft()
+            if kind == "frame":
+                buffer, repeat = item
+                if writer is not None:
+                    for _ in range(repeat):
+                        writer.write(buffer)
+                    self.written += repeat
+                self.free.append(buffer)
+            elif kind == "open":
+                height, width = self.shape[:2]
+                writer = cv2.VideoWriter(item, self.fourcc, self.fps, (width, height))
+                if not writer.isOpened():
+                    print(f"Error: Could not open recording {item}")
+                    writer = None
+            else:
+                if writer is not None:
+                    writer.release()
+                    writer = None
+                if kind == "stop":
+                    return
+
+    def close(self):
+        """Finish the current clip and wait for the encoder to drain"""
+        if self.recording:
+            self._stop_clip()
+        self._put("stop")
+        self.thread.join()
+
+    def report(self):
+        """Print the clips written and the frame counts"""
+        print(f"Recorded {self.written} frames into {len(self.clips)} clip(s), "
+              f"{self.dropped} dropped")
+        for path in self.clips:
+            print(f"  {path}")
+
+
+class ImageSaver:
+    """Writes screenshots on a background thread instead of the render loop"""
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="screenshot")
+
+    def save(self, filename, frame):
+        """Queue a copy of frame to be written to filename"""
+        self.executor.submit(self._write, filename, frame.copy())
+
+    @staticmethod
+    def _write(filename, frame):
+        if cv2.imwrite(filename, frame):
+            print(f"Screenshot saved as {filename}")
+        else:
+            print(f"Error: Could not save screenshot {filename}")
+
+    def close(self):
+        """Wait for pending screenshots"""
+        self.executor.shutdown(wait=True)
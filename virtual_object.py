@@ -5,6 +5,7 @@ Virtual object/boundary management
 import cv2
 import numpy as np
 from config import *
+from overlay_cache import LayerCache
 
 class VirtualObject:
     def __init__(self, shape="circle"):
@@ -14,11 +15,18 @@ class VirtualObject:
         self.width = VIRTUAL_OBJECT_WIDTH
         self.height = VIRTUAL_OBJECT_HEIGHT
         self.color = COLOR_SAFE
+        # The outline only changes with the state color: render it once per
+        # color and paste it into each frame
+        self.layers = LayerCache(self.draw_shape)
         
     def draw(self, frame):
         """Draw virtual object on frame"""
+        return self.layers.get(frame.shape, self.color).composite(frame)
+    
+    def draw_shape(self, frame, color):
+        """Rasterize the object outline and zones in a given color"""
         if self.shape == "circle":
-            cv2.circle(frame, self.center, self.radius, self.color, 3)
+            cv2.circle(frame, self.center, self.radius, color, 3)
             # Draw inner warning zone
             cv2.circle(frame, self.center, WARNING_THRESHOLD, COLOR_WARNING, 2)
             # Draw inner danger zone
@@ -27,7 +35,7 @@ class VirtualObject:
         elif self.shape == "rectangle":
             top_left = (self.center[0] - self.width//2, self.center[1] - self.height//2)
             bottom_right = (self.center[0] + self.width//2, self.center[1] + self.height//2)
-            cv2.rectangle(frame, top_left, bottom_right, self.color, 3)
+            cv2.rectangle(frame, top_left, bottom_right, color, 3)
             
         return frame
     
@@ -59,6 +67,23 @@ class VirtualObject:
             
             return np.sqrt(dx**2 + dy**2)
     
+    def calculate_distances(self, points):
+        """Vectorized calculate_distance for an (N, 2) array of points"""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if self.shape == "circle":
+            offsets = points - self.center
+            return np.hypot(offsets[:, 0], offsets[:, 1]) - self.radius
+        
+        # Distance to the closest point on the rectangle
+        top_left = (self.center[0] - self.width//2, self.center[1] - self.height//2)
+        bottom_right = (self.center[0] + self.width//2, self.center[1] + self.height//2)
+        offsets = points - np.clip(points, top_left, bottom_right)
+        return np.hypot(offsets[:, 0], offsets[:, 1])
+    
+    def distance_anchor(self, hand_position):
+        """Point the distance line from the hand is drawn to"""
+        return self.center
+    
     def set_color(self, color):
         """Update object color based on state"""
         self.color = color
\ No newline at end of file
@@ -5,14 +5,28 @@ Visualization and overlay rendering
 import cv2
 import numpy as np
 from config import *
+from buffer_arena import BufferArena
+from performance_monitor import NULL_MONITOR
+from overlay_cache import TextSprite
 
 class Visualizer:
-    def __init__(self, frame_width, frame_height):
+    def __init__(self, frame_width, frame_height, arena=None, profiler=None):
         self.frame_width = frame_width
         self.frame_height = frame_height
+        self.arena = arena if arena is not None else BufferArena()
+        self.profiler = profiler if profiler is not None else NULL_MONITOR
         
-    def draw_status_overlay(self, frame, state_manager, hand_position, distance):
-        """Draw status overlay on frame"""
+        # DANGER tint as a per-channel lookup table: blending a constant
+        # color layer at 30% is a fixed mapping of every channel value
+        levels = np.arange(256, dtype=np.uint8).reshape(1, 256, 1).repeat(3, axis=2)
+        tint = np.empty_like(levels)
+        tint[:] = COLOR_DANGER
+        self.danger_lut = cv2.addWeighted(tint, 0.3, levels, 0.7, 0)
+        self.danger_text = TextSprite("DANGER DANGER", FONT, 1.5, COLOR_TEXT, 3, COLOR_DANGER, 2)
+        
+    def draw_status_overlay(self, frame, state_manager, hand_position, distance,
+                            anchor=VIRTUAL_OBJECT_CENTER):
+        """Draw status overlay on frame, with a line from the hand to anchor"""
         # Draw state text
         state_text = f"STATE: {state_manager.get_state_text()}"
         cv2.putText(frame, state_text, (10, 30), FONT, TEXT_SCALE, 
@@ -23,36 +37,28 @@ class Visualizer:
             dist_text = f"Distance: {int(distance)}px"
             cv2.putText(frame, dist_text, (10, 60), FONT, 0.5, COLOR_TEXT, 1)
             
-            # Draw line from hand to object center
-            cv2.line(frame, hand_position, VIRTUAL_OBJECT_CENTER, (255, 255, 255), 1)
+            # Draw line from hand to the object (nearest zone)
+            if anchor is not None:
+                cv2.line(frame, hand_position, anchor, (255, 255, 255), 1)
         
         # Draw danger warning if in DANGER state
         if state_manager.get_state_text() == "DANGER":
             # BUG FIX: Must assign the result back to 'frame'
-            frame = self.draw_danger_warning(frame)
+            with self.profiler.span("danger_warning"):
+                frame = self.draw_danger_warning(frame)
         
         return frame
     
     def draw_danger_warning(self, frame):
         """Draw prominent DANGER warning"""
-        # Create semi-transparent red overlay
-        overlay = frame.copy()
-        cv2.rectangle(overlay, (0, 0), (self.frame_width, self.frame_height), 
-                  COLOR_DANGER, -1)
-        
-        # This function creates a NEW frame, so we must return it
-        frame = cv2.addWeighted(overlay, 0.3, frame, 0.7, 0)
+        # Semi-transparent red overlay, one in-place table lookup per pixel
+        cv2.LUT(frame, self.danger_lut, dst=frame)
         
-        # Draw large DANGER text
-        text = "DANGER DANGER"
-        text_size = cv2.getTextSize(text, FONT, 1.5, 3)[0]
+        # Draw large DANGER text (pre-rendered sprite, blended over its rectangle)
+        text_size = self.danger_text.size
         text_x = (self.frame_width - text_size[0]) // 2
         text_y = (self.frame_height + text_size[1]) // 2
-        
-        cv2.putText(frame, text, (text_x, text_y), FONT, 1.5, 
-                   COLOR_TEXT, 3, cv2.LINE_AA)
-        cv2.putText(frame, text, (text_x, text_y), FONT, 1.5, 
-                   COLOR_DANGER, 2, cv2.LINE_AA)
+        self.danger_text.composite(frame, (text_x, text_y))
         
         # Draw blinking effect
         import time
@@ -70,19 +76,29 @@ class Visualizer:
     
     def create_debug_display(self, main_frame, mask_frame, state_manager, fps):
         """Create side-by-side debug display"""
-        # Resize mask to match main frame
-        mask_resized = cv2.resize(mask_frame, (self.frame_width, self.frame_height))
-        
-        # Create combined display
-        combined = np.hstack((main_frame, mask_resized))
-        
-        # Add separator line
-        cv2.line(combined, (self.frame_width, 0), 
-                (self.frame_width, self.frame_height), (255, 255, 255), 2)
-        
-        # Add debug info
-        debug_text = f"State: {state_manager.get_state_text()} | FPS: {fps:.1f}"
-        cv2.putText(combined, debug_text, (10, self.frame_height - 10), 
-                   FONT, 0.5, COLOR_TEXT, 1)
+        with self.profiler.span("debug_view"):
+            height, width = main_frame.shape[:2]
+            combined = self.arena.get("debug_display", (height, 2 * width, 3))
+            
+            # Create combined display: main frame on the left, mask on the right
+            np.copyto(combined[:, :width], main_frame)
+            mask_view = combined[:, width:]
+            if mask_frame.ndim == 2:
+                mask_frame = cv2.cvtColor(mask_frame, cv2.COLOR_GRAY2BGR,
+                                          dst=self.arena.get("debug_mask", mask_frame.shape + (3,)))
+            # Resize mask to match main frame
+            if mask_frame.shape[:2] == (height, width):
+                np.copyto(mask_view, mask_frame)
+            else:
+                cv2.resize(mask_frame, (width, height), dst=mask_view)
+            
+            # Add separator line
+            cv2.line(combined, (self.frame_width, 0), 
+                    (self.frame_width, self.frame_height), (255, 255, 255), 2)
+            
+            # Add debug info
+            debug_text = f"State: {state_manager.get_state_text()} | FPS: {fps:.1f}"
+            cv2.putText(combined, debug_text, (10, self.frame_height - 10), 
+                       FONT, 0.5, COLOR_TEXT, 1)
         
         return combined
\ No newline at end of file
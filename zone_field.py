@@ -0,0 +1,183 @@
+"""
+Signed distance field over any number of virtual keep-out zones
+"""
+
+import cv2
+import numpy as np
+from config import *
+from overlay_cache import LayerCache
+
+
+class ZoneField:
+    """Rasterized keep-out zones with a precomputed signed distance field
+
+    Zones (circles, rectangles, polygons or a zone mask image) are drawn
+    once into a label image; a distance transform then gives, for every
+    pixel, the signed distance to the nearest zone boundary (negative
+    inside a zone) and the id of that zone. Per-frame queries are plain
+    array lookups, and the field is only rebuilt when the zones change.
+
+    Offers the same draw/calculate_distance/set_color interface as
+    VirtualObject so it can be used in its place.
+    """
+
+    def __init__(self, zones=(), width=FRAME_WIDTH, height=FRAME_HEIGHT):
+        self.width = width
+        self.height = height
+        self.zones = []
+        self.color = COLOR_SAFE
+        self.distance = None  # float32 (H, W) signed distance
+        self.zone_ids = None  # int32 (H, W) nearest zone id (1-based)
+        self.nearest = None   # int32 (H, W) nearest zone pixel (1-based, raster order)
+        self.zone_points = None  # (zone pixels, 2) x, y of every zone pixel
+        self.labels = np.zeros((height, width), dtype=np.int32)
+        self.dirty = True
+        self.layers = LayerCache(self.draw_zones)  # Outlines, per color
+        for zone in zones:
+            self.add_zone(zone)
+
+    def add_zone(self, zone):
+        """Add a zone dict, returns its id
+
+        {"type": "circle", "center": (x, y), "radius": r}
+        {"type": "rectangle", "top_left": (x, y), "bottom_right": (x, y)}
+        {"type": "polygon", "points": [(x, y), ...]}
+        """
+        if zone["type"] not in ("circle", "rectangle", "polygon"):
+            raise ValueError(f"Unknown zone type: {zone['type']}")
+        self.zones.append(dict(zone))
+        self.dirty = True
+        self.layers.clear()
+        return len(self.zones)
+
+    def add_mask(self, mask):
+        """Add zones from a mask image, one zone per distinct non-zero value"""
+        if mask.ndim == 3:
+            mask = cv2.cvtColor(mask, cv2.COLOR_BGR2GRAY)
+        if mask.shape != (self.height, self.width):
+            mask = cv2.resize(mask, (self.width, self.height), interpolation=cv2.INTER_NEAREST)
+        ids = []
+        for value in np.unique(mask):
+            if value == 0:
+                continue
+            region = mask == value
+            # Outline is extracted once here rather than on every draw
+            contours, _ = cv2.findContours(region.astype(np.uint8), cv2.RETR_EXTERNAL,
+                                           cv2.CHAIN_APPROX_SIMPLE)
+            self.zones.append({"type": "mask", "mask": region, "contours": contours})
+            ids.append(len(self.zones))
+        self.dirty = True
+        self.layers.clear()
+        return ids
+
+    def clear(self):
+        """Remove all zones"""
+        self.zones = []
+        self.dirty = True
+        self.layers.clear()
+
+    def _rasterize(self):
+        labels = self.labels
+        labels.fill(0)
+        for zone_id, zone in enumerate(self.zones, start=1):
+            kind = zone["type"]
+            if kind == "circle":
+                cv2.circle(labels, tuple(zone["center"]), int(zone["radius"]), zone_id, -1)
+            elif kind == "rectangle":
+                cv2.rectangle(labels, tuple(zone["top_left"]), tuple(zone["bottom_right"]), zone_id, -1)
+            elif kind == "polygon":
+                points = np.asarray(zone["points"], dtype=np.int32).reshape(-1, 1, 2)
+                cv2.fillPoly(labels, [points], zone_id)
+            else:
+                labels[zone["mask"]] = zone_id
+        return labels
+
+    def build(self):
+        """Rasterize the zones and compute the signed distance field"""
+        labels = self._rasterize()
+        inside = (labels > 0).astype(np.uint8)
+        if not inside.any():
+            self.distance = np.full((self.height, self.width), np.inf, dtype=np.float32)
+            self.zone_ids = np.zeros((self.height, self.width), dtype=np.int32)
+            self.nearest = self.zone_points = None
+            self.dirty = False
+            return
+
+        # Distance from outside pixels to the nearest zone pixel (exact)
+        outside = cv2.distanceTransform(1 - inside, cv2.DIST_L2, cv2.DIST_MASK_PRECISE)
+        # Distance from inside pixels to the nearest outside pixel
+        depth = cv2.distanceTransform(inside, cv2.DIST_L2, cv2.DIST_MASK_PRECISE)
+        self.distance = outside - depth
+
+        # Nearest zone pixel of every pixel; pixel labels number the zone
+        # pixels in raster order, which maps them back to zone ids
+        _, nearest = cv2.distanceTransformWithLabels(1 - inside, cv2.DIST_L2, cv2.DIST_MASK_5,
+                                                     labelType=cv2.DIST_LABEL_PIXEL)
+        zone_pixels = labels[inside > 0]
+        self.zone_ids = np.where(inside > 0, labels, zone_pixels[nearest - 1])
+        self.nearest = nearest
+        ys, xs = np.nonzero(inside)
+        self.zone_points = np.column_stack((xs, ys))
+        self.dirty = False
+
+    def _ensure_built(self):
+        if self.dirty:
+            self.build()
+
+    def query(self, point):
+        """(signed distance, nearest zone id) for one point; (inf, 0) if None"""
+        if point is None:
+            return float('inf'), 0
+        self._ensure_built()
+        x = min(max(int(point[0]), 0), self.width - 1)
+        y = min(max(int(point[1]), 0), self.height - 1)
+        return float(self.distance[y, x]), int(self.zone_ids[y, x])
+
+    def query_many(self, points):
+        """Vectorized query for an (N, 2) array of points, returns (distances, zone ids)"""
+        self._ensure_built()
+        points = np.asarray(points)
+        xs = np.clip(points[:, 0].astype(np.int64), 0, self.width - 1)
+        ys = np.clip(points[:, 1].astype(np.int64), 0, self.height - 1)
+        return self.distance[ys, xs], self.zone_ids[ys, xs]
+
+    def calculate_distance(self, hand_position):
+        """Signed distance from the hand to the nearest zone"""
+        return self.query(hand_position)[0]
+
+    def calculate_distances(self, points):
+        """Signed distances for an (N, 2) array of hand positions"""
+        return self.query_many(np.asarray(points).reshape(-1, 2))[0]
+    
+    def distance_anchor(self, hand_position):
+        """Nearest zone pixel to the hand, the end of its distance line"""
+        self._ensure_built()
+        if self.zone_points is None:
+            return None
+        x = min(max(int(hand_position[0]), 0), self.width - 1)
+        y = min(max(int(hand_position[1]), 0), self.height - 1)
+        point = self.zone_points[self.nearest[y, x] - 1]
+        return int(point[0]), int(point[1])
+    
+    def draw(self, frame):
+        """Draw all zone outlines on frame"""
+        return self.layers.get(frame.shape, self.color).composite(frame)
+    
+    def draw_zones(self, frame, color):
+        """Rasterize all zone outlines in a given color"""
+        for zone in self.zones:
+            kind = zone["type"]
+            if kind == "circle":
+                cv2.circle(frame, tuple(zone["center"]), int(zone["radius"]), color, 3)
+            elif kind == "rectangle":
+                cv2.rectangle(frame, tuple(zone["top_left"]), tuple(zone["bottom_right"]), color, 3)
+            elif kind == "polygon":
+                points = np.asarray(zone["points"], dtype=np.int32).reshape(-1, 1, 2)
+                cv2.polylines(frame, [points], True, color, 3)
+            else:
+                cv2.drawContours(frame, zone["contours"], -1, color, 3)
+        return frame
+
+    def set_color(self, color):
+        """Update zone color based on state"""
+        self.color = color